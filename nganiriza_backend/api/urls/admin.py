@@ -2,12 +2,17 @@ from django.urls import path
 from api.views.admin.service_providers import (
     list_service_providers,
     list_public_service_providers,
+    list_nearby_service_providers,
+    service_provider_map_feed,
+    import_service_providers,
+    export_service_providers,
     create_service_provider,
     get_service_provider,
     update_service_provider,
     delete_service_provider
 )
 from api.views.admin.users import list_users, get_user_detail
+from api.views.admin.exports import export_users, export_appointments, export_conversations
 from api.views.admin.specialists import (
     list_pending_specialists,
     get_specialist_for_approval,
@@ -18,7 +23,11 @@ urlpatterns = [
     # Service Providers (Clinics)
     path('service-providers/', list_service_providers, name='admin_list_service_providers'),
     path('service-providers/public/', list_public_service_providers, name='public_list_service_providers'),
+    path('service-providers/nearby/', list_nearby_service_providers, name='public_nearby_service_providers'),
+    path('service-providers/map/', service_provider_map_feed, name='public_service_provider_map_feed'),
     path('service-providers/create/', create_service_provider, name='admin_create_service_provider'),
+    path('service-providers/import/', import_service_providers, name='admin_import_service_providers'),
+    path('service-providers/export/', export_service_providers, name='admin_export_service_providers'),
     path('service-providers/<int:pk>/', get_service_provider, name='admin_get_service_provider'),
     path('service-providers/<int:pk>/update/', update_service_provider, name='admin_update_service_provider'),
     path('service-providers/<int:pk>/delete/', delete_service_provider, name='admin_delete_service_provider'),
@@ -27,6 +36,11 @@ urlpatterns = [
     path('users/', list_users, name='admin_list_users'),
     path('users/<int:pk>/', get_user_detail, name='admin_get_user_detail'),
     
+    # Exports
+    path('exports/users/', export_users, name='admin_export_users'),
+    path('exports/appointments/', export_appointments, name='admin_export_appointments'),
+    path('exports/conversations/', export_conversations, name='admin_export_conversations'),
+    
     # Specialists Approval
     path('specialists/pending/', list_pending_specialists, name='admin_list_pending_specialists'),
     path('specialists/<int:pk>/', get_specialist_for_approval, name='admin_get_specialist_for_approval'),
@@ -0,0 +1,6 @@
+from django.urls import path
+from api.views.locations.localities import locality_tree
+
+urlpatterns = [
+    path('localities/', locality_tree, name='locality_tree'),
+]
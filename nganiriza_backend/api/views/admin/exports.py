@@ -0,0 +1,164 @@
+import hashlib
+import hmac
+import re
+from itertools import groupby
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from django.conf import settings
+from django.contrib.auth.models import User
+from api.views.admin.users import USER_ROLE
+from base.exports import LAYOUTS, chunked, streaming_export
+from base.permisssions import IsSuperUser
+from models.models import Appointment, AppointmentHistory, Conversations, Messages
+
+# Rows per database round trip; related rows are fetched once per chunk
+EXPORT_CHUNK_SIZE = 1000
+
+USER_FIELDS = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'is_active', 'date_joined', 'last_login']
+
+APPOINTMENT_FIELDS = [
+    'id', 'user_id', 'username', 'specialist_id', 'appointment_date', 'appointment_time',
+    'duration_minutes', 'status', 'notes', 'cancellation_reason', 'created_at', 'history',
+]
+HISTORY_FIELDS = [
+    'action_type', 'previous_date', 'previous_time', 'previous_status',
+    'new_date', 'new_time', 'new_status', 'notes', 'changed_by_id', 'created_at',
+]
+
+CONVERSATION_FIELDS = ['id', 'participant', 'channel', 'language', 'title', 'created_at', 'message_count', 'messages']
+
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+(\.[\w-]+)+')
+_PHONE_RE = re.compile(r'\+?\d[\d\s-]{7,}\d')
+# Digits a match needs to count as a phone number rather than, say, a date
+PHONE_MIN_DIGITS = 9
+
+EXPORT_PARAMETERS = [
+    OpenApiParameter('layout', OpenApiTypes.STR, enum=list(LAYOUTS), description='csv (default) or jsonl'),
+]
+
+
+def _layout(request):
+    layout = request.GET.get('layout', 'csv')
+    return layout if layout in LAYOUTS else None
+
+
+def _invalid_layout():
+    return Response(
+        {"error": f"layout must be one of: {', '.join(LAYOUTS)}"},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def pseudonym(user_id):
+    """Stable, non-reversible stand-in for a user id, so transcripts of one person stay linkable"""
+    if user_id is None:
+        return None
+    digest = hmac.new(settings.SECRET_KEY.encode('utf-8'), f"user:{user_id}".encode('utf-8'), hashlib.sha256)
+    return digest.hexdigest()[:16]
+
+
+def redact(text):
+    """Mask email addresses and phone numbers in free text"""
+    if not text:
+        return text
+    text = _EMAIL_RE.sub('[email]', text)
+    return _PHONE_RE.sub(
+        lambda match: '[phone]' if sum(ch.isdigit() for ch in match.group()) >= PHONE_MIN_DIGITS else match.group(),
+        text
+    )
+
+
+def user_records():
+    users = User.objects.annotate(role=USER_ROLE).order_by('pk').values(*USER_FIELDS)
+    return users.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def appointment_records():
+    """Appointments oldest first, each with its change history"""
+    appointments = Appointment.objects.order_by('pk').values_list(
+        'pk', 'user_id', 'user__username', 'specialist_id', 'appointment_date', 'appointment_time',
+        'duration_minutes', 'status', 'notes', 'cancellation_reason', 'created_at',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for chunk in chunked(appointments, EXPORT_CHUNK_SIZE):
+        history = AppointmentHistory.objects.filter(
+            appointment_id__in=[row[0] for row in chunk]
+        ).order_by('appointment_id', 'created_at', 'pk').values_list('appointment_id', *HISTORY_FIELDS)
+        history_by_appointment = {
+            appointment_id: [dict(zip(HISTORY_FIELDS, row[1:])) for row in rows]
+            for appointment_id, rows in groupby(history, key=lambda row: row[0])
+        }
+        for row in chunk:
+            record = dict(zip(APPOINTMENT_FIELDS, row))
+            record['history'] = history_by_appointment.get(record['id'], [])
+            yield record
+
+
+def conversation_records():
+    """
+    Chat transcripts with the user replaced by a pseudonym and contact details
+    masked. Conversations the user deleted are left out.
+    """
+    conversations = Conversations.objects.filter(is_deleted=False).order_by('pk').values_list(
+        'pk', 'user_id', 'channel', 'language', 'title', 'created_at', 'message_count',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for chunk in chunked(conversations, EXPORT_CHUNK_SIZE):
+        messages = Messages.objects.filter(
+            conversation_id__in=[row[0] for row in chunk]
+        ).order_by('conversation_id', 'basemodel_ptr').values_list('conversation_id', 'role', 'content', 'created_at')
+        messages_by_conversation = {
+            conversation_id: [
+                {'role': role, 'content': redact(content), 'created_at': created_at}
+                for _, role, content, created_at in rows
+            ]
+            for conversation_id, rows in groupby(messages, key=lambda row: row[0])
+        }
+        for pk, user_id, channel, language, title, created_at, message_count in chunk:
+            yield {
+                'id': pk,
+                'participant': pseudonym(user_id),
+                'channel': channel,
+                'language': language,
+                'title': redact(title),
+                'created_at': created_at,
+                'message_count': message_count,
+                'messages': messages_by_conversation.get(pk, []),
+            }
+
+
+@extend_schema(tags=["Admin"], parameters=EXPORT_PARAMETERS, responses={(200, 'text/csv'): OpenApiTypes.STR, 400: dict})
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsSuperUser])
+def export_users(request):
+    """Stream every user with their role as CSV or JSONL"""
+    layout = _layout(request)
+    if layout is None:
+        return _invalid_layout()
+    return streaming_export(user_records(), USER_FIELDS, layout, 'users')
+
+
+@extend_schema(tags=["Admin"], parameters=EXPORT_PARAMETERS, responses={(200, 'text/csv'): OpenApiTypes.STR, 400: dict})
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsSuperUser])
+def export_appointments(request):
+    """Stream every appointment with its history (a JSON column in CSV) as CSV or JSONL"""
+    layout = _layout(request)
+    if layout is None:
+        return _invalid_layout()
+    return streaming_export(appointment_records(), APPOINTMENT_FIELDS, layout, 'appointments')
+
+
+@extend_schema(tags=["Admin"], parameters=EXPORT_PARAMETERS, responses={(200, 'text/csv'): OpenApiTypes.STR, 400: dict})
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsSuperUser])
+def export_conversations(request):
+    """Stream anonymized chat transcripts (messages as a JSON column in CSV) as CSV or JSONL"""
+    layout = _layout(request)
+    if layout is None:
+        return _invalid_layout()
+    return streaming_export(conversation_records(), CONVERSATION_FIELDS, layout, 'conversations')
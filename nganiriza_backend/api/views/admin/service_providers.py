@@ -1,10 +1,34 @@
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from drf_spectacular.utils import extend_schema
-from models.models import ServiceProvider, Province, District, Sector
-from models.serializers import ServiceProviderSerializer
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from django.http import StreamingHttpResponse
+from django.views.decorators.gzip import gzip_page
+from api.views.admin.services.provider_transfer import (
+    LAYOUTS as TRANSFER_LAYOUTS,
+    ImportFormatError,
+    export_providers,
+    import_providers,
+    layout_for,
+)
+from base.caching import cached_response, get_version
+from base.exports import CONTENT_TYPES
+from base.permisssions import IsSuperUser
+from base.querysets import shape_queryset
+from models.geo import nearest
+from models.localities import get_locality_index
+from models.models import ServiceProvider
+from models.serializers import ServiceProviderSerializer, NearbyServiceProviderSerializer
+
+NEARBY_DEFAULT_LIMIT = 10
+NEARBY_MAX_LIMIT = 50
+NEARBY_MAX_RADIUS_KM = 500
+
+# Not `format`, which DRF reserves for choosing the renderer
+MAP_FEED_LAYOUTS = ('columns', 'geojson')
 
 
 @extend_schema(
@@ -35,6 +59,189 @@ def list_public_service_providers(request):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@extend_schema(
+    tags=["Public"],
+    parameters=[
+        OpenApiParameter('lat', OpenApiTypes.FLOAT, required=True, description='Latitude of the user'),
+        OpenApiParameter('lng', OpenApiTypes.FLOAT, required=True, description='Longitude of the user'),
+        OpenApiParameter('radius_km', OpenApiTypes.FLOAT, description='Only providers within this distance'),
+        OpenApiParameter('limit', OpenApiTypes.INT, description=f'Number of providers (default {NEARBY_DEFAULT_LIMIT}, max {NEARBY_MAX_LIMIT})'),
+        OpenApiParameter('type', OpenApiTypes.STR, description='Filter by provider type (clinic, hotline, ...)'),
+    ],
+    responses={200: NearbyServiceProviderSerializer(many=True), 400: dict}
+)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def list_nearby_service_providers(request):
+    """Verified service providers nearest to a point, closest first - Public access"""
+    try:
+        latitude = float(request.GET['lat'])
+        longitude = float(request.GET['lng'])
+        limit = int(request.GET.get('limit', NEARBY_DEFAULT_LIMIT))
+        radius_km = request.GET.get('radius_km')
+        radius_km = float(radius_km) if radius_km else None
+    except KeyError:
+        return Response({"error": "lat and lng are required"}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({"error": "lat, lng, radius_km and limit must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return Response({"error": "lat/lng out of range"}, status=status.HTTP_400_BAD_REQUEST)
+    if radius_km is not None and not 0 < radius_km <= NEARBY_MAX_RADIUS_KM:
+        return Response(
+            {"error": f"radius_km must be between 0 and {NEARBY_MAX_RADIUS_KM}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = min(max(limit, 1), NEARBY_MAX_LIMIT)
+
+    queryset = shape_queryset(ServiceProvider.objects.filter(verified=True), NearbyServiceProviderSerializer)
+    provider_type = request.GET.get('type')
+    if provider_type:
+        queryset = queryset.filter(type__iexact=provider_type)
+
+    providers = []
+    for provider, distance in nearest(queryset, latitude, longitude, limit=limit, radius_km=radius_km):
+        provider.distance_km = round(distance, 3)
+        providers.append(provider)
+    serializer = NearbyServiceProviderSerializer(providers, many=True)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    tags=["Public"],
+    parameters=[
+        OpenApiParameter(
+            'layout', OpenApiTypes.STR, enum=list(MAP_FEED_LAYOUTS),
+            description='columns (default): one array per field; geojson: a FeatureCollection'
+        ),
+    ],
+    responses={200: dict, 304: None, 400: dict}
+)
+@gzip_page
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def service_provider_map_feed(request):
+    """
+    Compact feed of the verified providers with a position (id, type, name, lat, lng)
+    for drawing map markers - Public access. Details come from the provider endpoint.
+    """
+    return cached_response(request, ServiceProvider.CACHE_NAMESPACE, lambda: _build_map_feed(request))
+
+
+def _build_map_feed(request):
+    layout = request.GET.get('layout', 'columns')
+    if layout not in MAP_FEED_LAYOUTS:
+        return Response(
+            {"error": f"layout must be one of: {', '.join(MAP_FEED_LAYOUTS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    rows = list(
+        ServiceProvider.objects.filter(verified=True).exclude(geohash='')
+        .order_by('pk').values_list('pk', 'type', 'name', 'latitude', 'longitude')
+    )
+    version = get_version(ServiceProvider.CACHE_NAMESPACE)
+
+    if layout == 'geojson':
+        return Response({
+            "type": "FeatureCollection",
+            "version": version,
+            "features": [
+                {
+                    "type": "Feature",
+                    "id": pk,
+                    "geometry": {"type": "Point", "coordinates": [float(lng), float(lat)]},
+                    "properties": {"type": provider_type, "name": name},
+                }
+                for pk, provider_type, name, lat, lng in rows
+            ],
+        })
+
+    ids, types, names, lats, lngs = (list(column) for column in zip(*rows)) if rows else ([], [], [], [], [])
+    return Response({
+        "version": version,
+        "count": len(rows),
+        "id": ids,
+        "type": types,
+        "name": names,
+        "lat": [float(lat) for lat in lats],
+        "lng": [float(lng) for lng in lngs],
+    })
+
+
+@extend_schema(
+    tags=["Admin"],
+    request={'multipart/form-data': {
+        'type': 'object',
+        'properties': {'file': {'type': 'string', 'format': 'binary'}},
+    }},
+    parameters=[
+        OpenApiParameter('layout', OpenApiTypes.STR, enum=list(TRANSFER_LAYOUTS), description='Defaults to the file extension'),
+        OpenApiParameter('dry_run', OpenApiTypes.BOOL, description='Validate only, write nothing'),
+    ],
+    responses={200: dict, 400: dict}
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsSuperUser])
+@parser_classes([MultiPartParser])
+def import_service_providers(request):
+    """Create service providers from a CSV or JSONL file, reporting the rows that failed"""
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "Upload the providers as 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+
+    layout = request.GET.get('layout') or layout_for(upload.name)
+    dry_run = request.GET.get('dry_run', '').lower() in ['1', 'true', 'yes']
+    try:
+        report = import_providers(upload.file, layout, user=request.user, dry_run=dry_run)
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        return Response({"error": f"Could not read the file: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    tags=["Admin"],
+    parameters=[
+        OpenApiParameter('layout', OpenApiTypes.STR, enum=list(TRANSFER_LAYOUTS), description='csv (default) or jsonl'),
+    ],
+    responses={(200, 'text/csv'): OpenApiTypes.STR, 400: dict}
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsSuperUser])
+def export_service_providers(request):
+    """Stream every service provider as CSV or JSONL, in the import format"""
+    layout = request.GET.get('layout', 'csv')
+    if layout not in TRANSFER_LAYOUTS:
+        return Response(
+            {"error": f"layout must be one of: {', '.join(TRANSFER_LAYOUTS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    response = StreamingHttpResponse(export_providers(layout), content_type=CONTENT_TYPES[layout])
+    response['Content-Disposition'] = f'attachment; filename="service-providers.{layout}"'
+    return response
+
+
+def _resolve_locations(data):
+    """
+    Replace province/district/sector names in `data` with ids, each narrowed by
+    the level above it. Unknown names become None.
+    """
+    names = {field: data[field] for field in ('province', 'district', 'sector') if isinstance(data.get(field), str)}
+    if not names:
+        return
+
+    index = get_locality_index()
+    province_id, district_id, sector_id = index.resolve(**names)
+    if 'sector' in names and 'district' not in names and isinstance(data.get('district'), int):
+        # Sector name under a district given by id
+        sector_id = index.lookup('sector', names['sector'], data['district'])
+
+    resolved = {'province': province_id, 'district': district_id, 'sector': sector_id}
+    for field in names:
+        data[field] = resolved[field]
+
+
 @extend_schema(
     tags=["Admin"],
     request=ServiceProviderSerializer,
@@ -62,46 +269,7 @@ def create_service_provider(request):
             pass
     
     # Convert province/district/sector names to IDs if they're strings
-    province_obj = None
-    if 'province' in data and isinstance(data['province'], str):
-        try:
-            province_obj = Province.objects.get(name__iexact=data['province'])
-            data['province'] = province_obj.id
-        except Province.DoesNotExist:
-            data['province'] = None
-    
-    if 'district' in data and isinstance(data['district'], str):
-        try:
-            # If we have a province, filter by it; otherwise just by name
-            if province_obj:
-                district = District.objects.get(name__iexact=data['district'], province=province_obj)
-            else:
-                district = District.objects.get(name__iexact=data['district'])
-            data['district'] = district.id
-            # Update province_obj for sector lookup
-            province_obj = district.province
-        except District.DoesNotExist:
-            data['district'] = None
-    
-    if 'sector' in data and isinstance(data['sector'], str):
-        try:
-            # If we have a district, filter by it; otherwise just by name
-            district_obj = None
-            if 'district' in data and isinstance(data['district'], int):
-                district_obj = District.objects.get(id=data['district'])
-            elif 'district' in data and isinstance(data['district'], str):
-                if province_obj:
-                    district_obj = District.objects.filter(name__iexact=data['district'], province=province_obj).first()
-                else:
-                    district_obj = District.objects.filter(name__iexact=data['district']).first()
-            
-            if district_obj:
-                sector = Sector.objects.get(name__iexact=data['sector'], district=district_obj)
-            else:
-                sector = Sector.objects.get(name__iexact=data['sector'])
-            data['sector'] = sector.id
-        except Sector.DoesNotExist:
-            data['sector'] = None
+    _resolve_locations(data)
     
     serializer = ServiceProviderSerializer(data=data)
     if serializer.is_valid():
@@ -164,46 +332,7 @@ def update_service_provider(request, pk):
                 pass
         
         # Convert province/district/sector names to IDs if they're strings
-        province_obj = None
-        if 'province' in data and isinstance(data['province'], str):
-            try:
-                province_obj = Province.objects.get(name__iexact=data['province'])
-                data['province'] = province_obj.id
-            except Province.DoesNotExist:
-                data['province'] = None
-        
-        if 'district' in data and isinstance(data['district'], str):
-            try:
-                # If we have a province, filter by it; otherwise just by name
-                if province_obj:
-                    district = District.objects.get(name__iexact=data['district'], province=province_obj)
-                else:
-                    district = District.objects.get(name__iexact=data['district'])
-                data['district'] = district.id
-                # Update province_obj for sector lookup
-                province_obj = district.province
-            except District.DoesNotExist:
-                data['district'] = None
-        
-        if 'sector' in data and isinstance(data['sector'], str):
-            try:
-                # If we have a district, filter by it; otherwise just by name
-                district_obj = None
-                if 'district' in data and isinstance(data['district'], int):
-                    district_obj = District.objects.get(id=data['district'])
-                elif 'district' in data and isinstance(data['district'], str):
-                    if province_obj:
-                        district_obj = District.objects.filter(name__iexact=data['district'], province=province_obj).first()
-                    else:
-                        district_obj = District.objects.filter(name__iexact=data['district']).first()
-                
-                if district_obj:
-                    sector = Sector.objects.get(name__iexact=data['sector'], district=district_obj)
-                else:
-                    sector = Sector.objects.get(name__iexact=data['sector'])
-                data['sector'] = sector.id
-            except Sector.DoesNotExist:
-                data['sector'] = None
+        _resolve_locations(data)
         
         serializer = ServiceProviderSerializer(provider, data=data, partial=partial)
         if serializer.is_valid():
@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+from base.caching import bump_version
+from base.exports import LAYOUTS, export_lines
+from base.models import suffixed_slug
+from base.querysets import bulk_create_with_parent
+from models.localities import get_locality_index
+from models.models import ServiceProvider
+
+# Column order of CSV files, both ways; JSONL objects use the same keys
+FIELDS = ['name', 'type', 'phone', 'open_hours', 'verified', 'latitude', 'longitude', 'province', 'district', 'sector']
+
+# Keep the report of a badly formatted file to a readable size
+MAX_REPORTED_ERRORS = 200
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+# Latitude/longitude columns have 6 decimal places
+COORDINATE_STEP = Decimal('0.000001')
+
+# Validated on the instance; relations are checked against the locality index instead
+_UNCHECKED_FIELDS = {'slug', 'geohash', 'created_by', 'updated_by', 'province', 'district', 'sector'}
+
+
+class ImportFormatError(Exception):
+    """Raised when the file as a whole cannot be read (unknown layout, missing columns)"""
+
+
+def layout_for(filename, default='csv'):
+    """Layout of an upload from its extension"""
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def iter_rows(file, layout):
+    """
+    Yield (line number, row dict or error message) from a binary file, one line at
+    a time. Rows that are not valid JSON objects are yielded as error messages.
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    if layout == 'csv':
+        reader = csv.DictReader(text)
+        missing = {'name', 'type'} - set(reader.fieldnames or [])
+        if missing:
+            raise ImportFormatError(f"Missing columns: {', '.join(sorted(missing))}")
+        for row in reader:
+            yield reader.line_num, row
+    elif layout == 'jsonl':
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_number, "Invalid JSON"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Each line must be a JSON object"
+    else:
+        raise ImportFormatError(f"layout must be one of: {', '.join(LAYOUTS)}")
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _coordinate(value, limit, errors, field):
+    try:
+        number = Decimal(value).quantize(COORDINATE_STEP)
+    except (InvalidOperation, ValueError):
+        errors[field] = "Must be a number"
+        return None
+    if not number.is_finite() or not -limit <= number <= limit:
+        errors[field] = f"Must be between -{limit} and {limit}"
+        return None
+    return number
+
+
+def build_provider(row, index):
+    """
+    An unsaved ServiceProvider from an import row, with locations resolved through
+    the locality index and coordinates rounded to the column's 6 decimals.
+    Returns (provider, errors by field).
+    """
+    errors = {}
+    values = {field: _text(row.get(field)) for field in FIELDS}
+
+    latitude = longitude = None
+    if values['latitude'] or values['longitude']:
+        latitude = _coordinate(values['latitude'], 90, errors, 'latitude')
+        longitude = _coordinate(values['longitude'], 180, errors, 'longitude')
+
+    province_id, district_id, sector_id = index.resolve(
+        values['province'] or None, values['district'] or None, values['sector'] or None
+    )
+    for field, pk in (('province', province_id), ('district', district_id), ('sector', sector_id)):
+        if values[field] and pk is None:
+            errors[field] = f"Unknown {field} '{values[field]}'"
+
+    provider = ServiceProvider(
+        name=values['name'],
+        type=values['type'],
+        phone=values['phone'],
+        open_hours=values['open_hours'],
+        verified=values['verified'].lower() in TRUE_VALUES,
+        latitude=latitude,
+        longitude=longitude,
+        province_id=province_id,
+        district_id=district_id,
+        sector_id=sector_id,
+    )
+    try:
+        provider.clean_fields(exclude=_UNCHECKED_FIELDS | set(errors))
+    except ValidationError as e:
+        errors.update({field: ' '.join(messages) for field, messages in e.message_dict.items()})
+    return provider, errors
+
+
+def _assign_slugs(providers):
+    """BaseModel.save slugs for a batch, with one query instead of one per row"""
+    max_length = ServiceProvider._meta.get_field('slug').max_length
+    wanted = [(provider, slugify(provider.name)[:max_length]) for provider in providers]
+    taken = set(
+        ServiceProvider.objects.filter(slug__in={slug for _, slug in wanted}).values_list('slug', flat=True)
+    )
+    for provider, slug in wanted:
+        if not slug or slug in taken:
+            slug = suffixed_slug(slug, max_length)
+        taken.add(slug)
+        provider.slug = slug
+
+
+def _create(providers, user):
+    _assign_slugs(providers)
+    for provider in providers:
+        provider.geohash = provider.compute_geohash()
+        provider.created_by = provider.updated_by = user
+    bulk_create_with_parent(providers)
+
+
+def import_providers(file, layout, user=None, batch_size=500, dry_run=False):
+    """
+    Validate and insert every row of a CSV or JSONL file of service providers.
+
+    Valid rows are inserted in batches inside one transaction; invalid ones are
+    skipped and listed in the returned report with their line number. With
+    `dry_run` nothing is written.
+    """
+    index = get_locality_index()
+    report = {'rows': 0, 'created': 0, 'failed': 0, 'errors': [], 'dry_run': dry_run}
+    batch = []
+
+    with transaction.atomic():
+        for line_number, row in iter_rows(file, layout):
+            report['rows'] += 1
+            if isinstance(row, str):
+                provider, errors = None, {'row': row}
+            else:
+                provider, errors = build_provider(row, index)
+
+            if errors:
+                report['failed'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'line': line_number, 'errors': errors})
+                continue
+
+            report['created'] += 1
+            batch.append(provider)
+            if len(batch) >= batch_size:
+                if not dry_run:
+                    _create(batch, user)
+                batch = []
+
+        if batch and not dry_run:
+            _create(batch, user)
+
+    # bulk inserts send no signals
+    if report['created'] and not dry_run:
+        bump_version(ServiceProvider.CACHE_NAMESPACE)
+    return report
+
+
+def export_providers(layout, queryset=None, chunk_size=1000):
+    """Yield service providers as CSV lines or JSON lines, in the import's format"""
+    queryset = ServiceProvider.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('pk').values_list(
+        'name', 'type', 'phone', 'open_hours', 'verified', 'latitude', 'longitude',
+        'province__name', 'district__name', 'sector__name',
+    ).iterator(chunk_size=chunk_size)
+
+    records = (dict(zip(FIELDS, row)) for row in rows)
+    if layout == 'jsonl':
+        records = (
+            {**record, 'latitude': _float(record['latitude']), 'longitude': _float(record['longitude'])}
+            for record in records
+        )
+    return export_lines(records, FIELDS, layout)
+
+
+def _float(value):
+    return None if value is None else float(value)
@@ -2,89 +2,78 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
 from django.contrib.auth.models import User
-from models.models import Account
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce
+from models.models import USER_ROLES
+from models.search import user_search_q
+from base.pagination import KeysetPagination
+from core.database import replica_reads
+
+ROLES = [role for role, _ in USER_ROLES]
+
+# Superusers are admins whatever their account says; users without an account are plain users
+USER_ROLE = Case(
+    When(is_superuser=True, then=Value('admin')),
+    default=Coalesce(F('account__role'), Value('user')),
+)
+
+LIST_FIELDS = ['id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'date_joined', 'last_login']
+
+
+def _user_data(user):
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "full_name": user.get_full_name(),
+        "role": user.role_name,
+        "is_active": user.is_active,
+        "date_joined": user.date_joined,
+        "last_login": user.last_login,
+    }
 
 
 @extend_schema(
     tags=["Admin"],
+    parameters=[
+        OpenApiParameter('search', OpenApiTypes.STR, description='Word prefixes of username, email or name (accent-insensitive)'),
+        OpenApiParameter('role', OpenApiTypes.STR, enum=ROLES),
+        OpenApiParameter('page', OpenApiTypes.INT),
+        OpenApiParameter('page_size', OpenApiTypes.INT),
+        OpenApiParameter('cursor', OpenApiTypes.STR, description='Keyset cursor from a previous page (empty for the first page)'),
+    ],
     responses={200: dict}
 )
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@replica_reads
 def list_users(request):
     """List all users with pagination"""
-    page = max(int(request.GET.get("page", 1)), 1)
-    page_size = min(max(int(request.GET.get("page_size", 20)), 1), 100)
-    start = (page - 1) * page_size
-    end = start + page_size
-    
     search = request.GET.get("search", "").strip()
     role_filter = request.GET.get("role", "").strip()
     
-    users = User.objects.all().order_by('-date_joined')
+    # Role comes from the joined account row, so a page is a single query
+    users = User.objects.annotate(role_name=USER_ROLE).only(*LIST_FIELDS)
     
-    # Search filter
+    # Search filter: every word must prefix-match a word of the username, email or names
     if search:
-        users = users.filter(
-            username__icontains=search
-        ) | users.filter(
-            email__icontains=search
-        ) | users.filter(
-            first_name__icontains=search
-        ) | users.filter(
-            last_name__icontains=search
-        )
-    
-    # Role filter
-    if role_filter:
-        if role_filter == "admin":
-            users = users.filter(is_superuser=True)
-        elif role_filter == "specialist":
-            users = users.filter(is_staff=True, is_superuser=False)
-        elif role_filter == "user":
-            users = users.filter(is_staff=False, is_superuser=False)
+        users = users.filter(user_search_q(search))
     
-    total = users.count()
-    users_page = users[start:end]
+    # Role filter, on the same expression the listing shows
+    if role_filter in ROLES:
+        users = users.filter(role_name=role_filter)
     
-    # Get account info for each user
-    user_data = []
-    for user in users_page:
-        try:
-            account = Account.objects.get(user=user)
-            account_role = account.role
-        except Account.DoesNotExist:
-            account_role = "user"
-        
-        # Determine role
-        if user.is_superuser:
-            role = "admin"
-        elif user.is_staff:
-            role = "specialist"
-        else:
-            role = account_role or "user"
-        
-        user_data.append({
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "full_name": user.get_full_name(),
-            "role": role,
-            "is_active": user.is_active,
-            "date_joined": user.date_joined,
-            "last_login": user.last_login,
-        })
+    # Admins page through every account, so the total is approximate and reused for a minute
+    paginator = KeysetPagination(ordering=['-date_joined', '-pk'], count='cached')
+    users_page = paginator.paginate_queryset(users, request)
     
-    return Response({
-        "count": total,
-        "next": page + 1 if end < total else None,
-        "previous": page - 1 if start > 0 else None,
-        "results": user_data
-    }, status=status.HTTP_200_OK)
+    user_data = [_user_data(user) for user in users_page]
+    return paginator.get_paginated_response(user_data, status=status.HTTP_200_OK)
 
 
 @extend_schema(
@@ -96,40 +85,16 @@ def list_users(request):
 def get_user_detail(request, pk):
     """Get detailed information about a specific user"""
     try:
-        user = User.objects.get(pk=pk)
-        try:
-            account = Account.objects.get(user=user)
-            account_role = account.role
-        except Account.DoesNotExist:
-            account_role = "user"
-        
-        # Determine role
-        if user.is_superuser:
-            role = "admin"
-        elif user.is_staff:
-            role = "specialist"
-        else:
-            role = account_role or "user"
-        
-        user_data = {
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "full_name": user.get_full_name(),
-            "role": role,
-            "is_active": user.is_active,
-            "is_staff": user.is_staff,
-            "is_superuser": user.is_superuser,
-            "date_joined": user.date_joined,
-            "last_login": user.last_login,
-        }
-        
-        return Response(user_data, status=status.HTTP_200_OK)
+        user = User.objects.annotate(role_name=USER_ROLE).get(pk=pk)
     except User.DoesNotExist:
         return Response(
             {"error": "User not found"},
             status=status.HTTP_404_NOT_FOUND
         )
 
+    user_data = _user_data(user)
+    user_data.update({
+        "is_staff": user.is_staff,
+        "is_superuser": user.is_superuser,
+    })
+    return Response(user_data, status=status.HTTP_200_OK)
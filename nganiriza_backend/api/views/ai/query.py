@@ -5,8 +5,9 @@ from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from models.serializers import QuerySerializer, AIResponseSerializer
-from models.models import Conversations, Messages
+from models.models import Conversations
 from .ollama_service import OllamaService
+from .services.chat import conversation_history as get_conversation_history, fallback_title, record_chat_turn
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +21,22 @@ def get_ollama_service():
         _ollama_service = OllamaService()
     return _ollama_service
 
+
+def save_turn(conv, messages, title=None):
+    """
+    Persist a chat turn, logging rather than failing the request if it cannot
+    be saved. Returns whether it was saved.
+    """
+    if conv is None:
+        return False
+    try:
+        record_chat_turn(conv, messages, title=title)
+    except Exception as e:
+        logger.error(f"Error saving chat turn: {e}")
+        return False
+    return True
+
+
 @extend_schema(
     tags=["AI"],
     request=QuerySerializer,
@@ -50,7 +67,8 @@ def ai_query(request):
     conversation_id = data.get("conversation_id")
     language = data.get("language", "eng")
     
-    # Get or create conversation if user is authenticated
+    # Get or start the conversation if the user is authenticated. A new
+    # conversation is only written together with the first turn.
     conv = None
     conversation_history = []
     
@@ -59,60 +77,25 @@ def ai_query(request):
             if conversation_id:
                 # Get existing conversation (using id_number as primary key)
                 conv = Conversations.objects.get(id_number=conversation_id, user=request.user, is_deleted=False)
-            else:
-                # Create new conversation
-                conv = Conversations.objects.create(
-                    user=request.user,
-                    title="",
-                    language=language,
-                    channel="web"
-                )
-                conversation_id = conv.id_number
-            
-            # Save user message directly
-            user_msg = Messages.objects.create(
-                conversation=conv,
-                role="user",
-                content=query
-            )
-            
-            # Get conversation history (excluding the message we just added for the query)
-            messages = conv.messages.all().order_by('created_at')
-            conversation_history = [
-                {"role": msg.role, "content": msg.content}
-                for msg in messages
-                if msg.id_number != user_msg.id_number  # Exclude current user message from history
-            ]
-            
+                conversation_history = get_conversation_history(conv)
         except Conversations.DoesNotExist:
             logger.warning(f"Conversation {conversation_id} not found for user {request.user}")
-            # If conversation doesn't exist, create a new one
-            try:
-                conv = Conversations.objects.create(
-                    user=request.user,
-                    title="",
-                    language=language,
-                    channel="web"
-                )
-                conversation_id = conv.id_number
-                # Save user message to new conversation directly
-                user_msg = Messages.objects.create(
-                    conversation=conv,
-                    role="user",
-                    content=query
-                )
-                conversation_history = []
-            except Exception as e:
-                logger.error(f"Error creating new conversation: {e}")
-                conv = None
         except Exception as e:
             logger.error(f"Error handling conversation: {e}")
-            conv = None
+        if conv is None:
+            conv = Conversations(
+                user=request.user,
+                title="",
+                language=language,
+                channel="web"
+            )
     
     # Get system prompt (default for Kinyarwanda counseling)
     system_prompt = data.get("system_prompt") or """You are a helpful english. Be empathetic, supportive, and non-judgmental."""
     
     ollama_service = get_ollama_service()
+    turn_attempted = False
+    turn_saved = False
     
     try:
         # Generate AI response
@@ -126,6 +109,8 @@ def ai_query(request):
         )
 
         if not result.get("success", False):
+            turn_attempted = True
+            save_turn(conv, [("user", query)])
             return Response(
                 {"error": result.get("error", "Ollama service failed"), "details": result},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -133,42 +118,29 @@ def ai_query(request):
 
         assistant_response = result.get("response", "")
         
-        # Save assistant reply if conversation exists
-        assistant_msg = None
-        if conv and assistant_response:
-            try:
-                # Save assistant reply directly
-                assistant_msg = Messages.objects.create(
-                    conversation=conv,
-                    role="assistant",
-                    content=assistant_response
-                )
-                
-                # Generate title if needed (after first user message)
-                if not conv.title or conv.title.strip() == "":
-                    user_message_count = conv.messages.filter(role='user').count()
-                    if user_message_count >= 1:
-                        try:
-                            # Get full conversation history for title generation
-                            all_messages = conv.messages.all().order_by('created_at')
-                            full_history = [
-                                {"role": msg.role, "content": msg.content}
-                                for msg in all_messages
-                            ]
-                            title = ollama_service.generate_title(full_history)
-                            if title and title.strip():
-                                conv.title = title
-                                conv.save(update_fields=['title'])
-                                logger.info(f"Generated title for conversation {conv.id_number}: {title}")
-                        except Exception as e:
-                            logger.warning(f"Failed to generate title: {e}")
-                            # Fallback: use first user message
-                            first_user_msg = conv.messages.filter(role='user').first()
-                            if first_user_msg and first_user_msg.content:
-                                conv.title = first_user_msg.content[:50]
-                                conv.save(update_fields=['title'])
-            except Exception as e:
-                logger.error(f"Error saving assistant message: {e}")
+        # Save the user message, the assistant reply and the title in one go
+        if conv:
+            turn = [("user", query)]
+            if assistant_response:
+                turn.append(("assistant", assistant_response))
+            
+            # Generate title if needed (after first user message)
+            title = None
+            if assistant_response and (not conv.title or conv.title.strip() == ""):
+                full_history = conversation_history + [{"role": role, "content": content} for role, content in turn]
+                try:
+                    title = ollama_service.generate_title(full_history)
+                    if title and title.strip():
+                        logger.info(f"Generated title for conversation {conv.id_number}: {title}")
+                except Exception as e:
+                    logger.warning(f"Failed to generate title: {e}")
+                    title = None
+                if not title or not title.strip():
+                    # Fallback: use first user message
+                    title = fallback_title(full_history)
+            
+            turn_attempted = True
+            turn_saved = save_turn(conv, turn, title=title)
         
         # Return response with conversation info
         response_data = {
@@ -177,7 +149,9 @@ def ai_query(request):
             "cached": result.get("cached", False)
         }
         
-        if conv:
+        # A new conversation whose turn failed to save does not exist, so its
+        # id would 404 on the next turn
+        if turn_saved:
             response_data["conversation_id"] = str(conv.id_number)
             response_data["title"] = conv.title
         
@@ -185,6 +159,8 @@ def ai_query(request):
 
     except Exception as e:
         logger.exception("ai_query_api error")
+        if not turn_attempted:
+            save_turn(conv, [("user", query)])
         return Response(
             {"error": f"There was an error: {str(e)}", "success": False},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -232,7 +208,7 @@ def generate_conversation_title(request):
     
     try:
         conv = Conversations.objects.get(id_number=conversation_id, user=request.user)
-        messages = conv.messages.all().order_by('created_at')
+        messages = conv.messages.all().order_by('basemodel_ptr')
         
         conversation_history = [
             {"role": msg.role, "content": msg.content}
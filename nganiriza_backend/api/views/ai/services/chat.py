@@ -0,0 +1,49 @@
+from django.db import transaction
+from base.querysets import bulk_create_with_parent
+from models.models import Conversations, Messages
+
+# Title used when the model could not generate one
+FALLBACK_TITLE_LENGTH = 50
+
+
+def conversation_history(conversation):
+    """Messages of a conversation as [{"role", "content"}], oldest first, without loading models"""
+    if conversation is None or conversation._state.adding:
+        return []
+    return [
+        {"role": role, "content": content}
+        for role, content in conversation.messages.order_by('basemodel_ptr').values_list('role', 'content')
+    ]
+
+
+def fallback_title(history):
+    """First user message, truncated, for conversations the model could not title"""
+    first_user = next((m["content"] for m in history if m["role"] == "user" and m["content"]), "")
+    return first_user[:FALLBACK_TITLE_LENGTH]
+
+
+def record_chat_turn(conversation, messages, title=None):
+    """
+    Persist one chat turn in a single transaction.
+
+    `messages` is a list of (role, content) pairs in order, typically the user's
+    message and the assistant's reply. The conversation is inserted first if it
+    is new; the messages are bulk inserted and the conversation's previews,
+    counters and (optional) title are updated with one UPDATE. Returns the
+    created Messages.
+    """
+    with transaction.atomic():
+        if conversation._state.adding:
+            conversation.save()
+
+        created = bulk_create_with_parent(
+            Messages(conversation=conversation, role=role, content=content, name="")
+            for role, content in messages
+        )
+
+        fields = {}
+        if title:
+            fields["title"] = title
+            conversation.title = title
+        Conversations.record_messages(conversation.pk, created, **fields)
+    return created
@@ -6,12 +6,18 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from models.serializers import LoginRequestSerializer, LoginResponseSerializer
+from base.ratelimit import SlidingWindowLimiter, client_ip, hit_limits, too_many_attempts
+
+# Every attempt counts per address; only failures count per username (successes are
+# taken back), so a credential-stuffing run cannot lock out the account's owner for long
+login_ip_limiter = SlidingWindowLimiter.from_settings('login_ip')
+login_username_limiter = SlidingWindowLimiter.from_settings('login_username')
 
 
 @extend_schema(
     tags=["Auth"],
     request=LoginRequestSerializer,
-    responses={200: LoginResponseSerializer, 400: dict, 404: dict, 500: dict},
+    responses={200: LoginResponseSerializer, 400: dict, 404: dict, 429: dict, 500: dict},
     auth=[]
 )
 @api_view(["POST"])
@@ -19,10 +25,19 @@ from models.serializers import LoginRequestSerializer, LoginResponseSerializer
 def login_api(request):
     username = request.data.get("username")
     password = request.data.get("password")
+
+    # Counted before authenticate(), which hashes the password even for unknown users
+    ip = client_ip(request)
+    username_key = str(username).strip().lower() if username else None
+    retry_after = hit_limits((login_ip_limiter, ip), (login_username_limiter, username_key))
+    if retry_after:
+        return too_many_attempts(retry_after)
+
     try:  
         if username and password:
             user = authenticate(username=username, password=password)
             if user:
+                login_username_limiter.refund(username_key)
 
                 if user.is_active:
                     refresh = RefreshToken.for_user(user)
@@ -1,22 +1,27 @@
-from django.utils import timezone
-import random
-import string
-from models.models import ResetPassword, ResetPasswordConfirmation
+from models.models import ResetPasswordConfirmation
 from models.serializers import PasswordResetRequestSerializer, PasswordResetConfirmSerializer
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.models import User
 from authentication.services.emails.emails import *
+from authentication.services.emails.registry import preferred_language
+from authentication.services.reset_codes import InvalidResetCode, issue_code, verify_code
 from django.contrib.auth.hashers import make_password
 from drf_spectacular.utils import extend_schema
 from models.serializers import LogoutRequestSerializer
+from base.ratelimit import SlidingWindowLimiter, client_ip, hit_limits, too_many_attempts
+
+# Each request sends an email; each confirmation is a guess at a 6 character code
+reset_ip_limiter = SlidingWindowLimiter.from_settings('reset_ip')
+reset_email_limiter = SlidingWindowLimiter.from_settings('reset_email')
+reset_confirm_email_limiter = SlidingWindowLimiter.from_settings('reset_confirm_email')
 
 
 @extend_schema(
     tags=["Auth"],
     request=PasswordResetRequestSerializer,
-    responses={200: dict, 400: dict, 404: dict, 500: dict},
+    responses={200: dict, 400: dict, 404: dict, 429: dict, 500: dict},
     auth=[]
 )
 @api_view(["POST"])
@@ -25,17 +30,18 @@ def password_reset_request(request):
     email = request.data.get("email")
     if not email:
         return Response({"error": "Email is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+    ip = client_ip(request)
+    email_key = str(email).strip().lower()
+    retry_after = hit_limits((reset_ip_limiter, ip), (reset_email_limiter, email_key))
+    if retry_after:
+        return too_many_attempts(retry_after)
     
     try:
         user = User.objects.get(email=email)
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        ResetPassword.objects.create(
-            email=email,
-            code=code,
-            expires=timezone.now() + timezone.timedelta(minutes=5),
-        )
+        code = issue_code(email)
         # Send the email with the code to the user's email address
-        reset_email_password(email, user.first_name, code)
+        reset_email_password(email, user.first_name, code, language=preferred_language(user))
         return Response({"message": "Password reset instructions sent to email"}, status=status.HTTP_200_OK)
 
     except User.DoesNotExist:
@@ -49,7 +55,7 @@ def password_reset_request(request):
 @extend_schema(
     tags=["Auth"],
     request=PasswordResetConfirmSerializer,
-    responses={200: dict, 400: dict, 500: dict},
+    responses={200: dict, 400: dict, 429: dict, 500: dict},
     auth=[]
 )
 @api_view(["POST"])
@@ -62,22 +68,26 @@ def password_reset_confirm(request):
     if not code or not email or not new_password:
         return Response({"error": "Code, Email, and new password are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        reset_password_entry = ResetPassword.objects.get(email=email, code=code)
-
-        if timezone.now() > reset_password_entry.expires:
-            return Response({"error": "The reset code has expired"}, status=status.HTTP_400_BAD_REQUEST)
+    ip = client_ip(request)
+    email_key = str(email).strip().lower()
+    retry_after = hit_limits((reset_ip_limiter, ip), (reset_confirm_email_limiter, email_key))
+    if retry_after:
+        return too_many_attempts(retry_after)
 
+    try:
         user = User.objects.get(email=email)
+        try:
+            verify_code(email, code)
+        except InvalidResetCode as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         user.password = make_password(new_password)
         user.save()
 
-        reset_password_entry.delete()
-
         try:
             # Send email to confirm new password to the user's email address
             user = User.objects.get(email=email)
-            confirm_reset_email(email, user.first_name)
+            confirm_reset_email(email, user.first_name, language=preferred_language(user))
         except Exception as e:
                 return Response({"error": "An error occurred while sending confirmation email"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         return Response({"success":"Password has been reset successfully. An email has been sent to your email address"}, status=status.HTTP_200_OK)
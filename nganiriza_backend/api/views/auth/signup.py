@@ -12,6 +12,9 @@ from models.models import Account, AccountEmail, Sector, USER_ROLES, SpecialistP
 from models.serializers import UserSerializer, SignupRequestSerializer
 from drf_spectacular.utils import extend_schema
 from django.db import transaction
+from base.ratelimit import SlidingWindowLimiter, client_ip, hit_limits, too_many_attempts
+
+signup_ip_limiter = SlidingWindowLimiter.from_settings('signup_ip')
 
 
 @extend_schema(
@@ -57,6 +60,14 @@ from django.db import transaction
                 }
             }
         },
+        429: {
+            "description": "Too many signups from this address",
+            "content": {
+                "application/json": {
+                    "example": {"error": "Too many attempts. Please try again later.", "retry_after": 60}
+                }
+            }
+        },
         500: {
             "description": "Internal server error",
             "content": {
@@ -71,6 +82,11 @@ from django.db import transaction
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def new_user(request):
+    ip = client_ip(request)
+    retry_after = hit_limits((signup_ip_limiter, ip))
+    if retry_after:
+        return too_many_attempts(retry_after)
+
     email = request.data.get("email")
     full_name = request.data.get("full_name")
     password = request.data.get("password")
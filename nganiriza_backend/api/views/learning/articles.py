@@ -4,25 +4,26 @@ from rest_framework.response import Response
 from rest_framework import status
 from models.models import Article
 from models.serializers import ArticleSerializer
+from base.pagination import KeysetPagination
+from core.database import replica_reads
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def list_articles(request):
     locale = request.GET.get("locale", "eng")
     tag = request.GET.get("tag")
     qs = Article.objects.filter(is_published=True, locale=locale)
     if tag:
         qs = qs.extra(where=["%s = ANY(tags)"], params=[tag])
-    page = max(int(request.GET.get("page", 1)), 1)
-    page_size = min(max(int(request.GET.get("page_size", 20)), 1), 100)
-    start, end = (page-1)*page_size, page*page_size
-    total = qs.count()
-    data = ArticleSerializer(qs[start:end], many=True).data
-    return Response({"count": total, "next": page+1 if end<total else None,
-                     "previous": page-1 if start>0 else None, "results": data}, status=200)
+    paginator = KeysetPagination(ordering=["-updated_at", "-pk"])
+    page = paginator.paginate_queryset(qs, request)
+    data = ArticleSerializer(page, many=True).data
+    return paginator.get_paginated_response(data, status=200)
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def get_article(request, pk):
     art = Article.objects.filter(id_number=pk, is_published=True).first()
     if not art:
@@ -116,10 +117,7 @@ def list_all_articles(request):
         qs = qs.filter(locale=locale)
     if tag:
         qs = qs.extra(where=["%s = ANY(tags)"], params=[tag])
-    page = max(int(request.GET.get("page", 1)), 1)
-    page_size = min(max(int(request.GET.get("page_size", 20)), 1), 100)
-    start, end = (page-1)*page_size, page*page_size
-    total = qs.count()
-    data = ArticleSerializer(qs[start:end], many=True).data
-    return Response({"count": total, "next": page+1 if end<total else None,
-                     "previous": page-1 if start>0 else None, "results": data}, status=200)
+    paginator = KeysetPagination(ordering=["-updated_at", "-pk"])
+    page = paginator.paginate_queryset(qs, request)
+    data = ArticleSerializer(page, many=True).data
+    return paginator.get_paginated_response(data, status=200)
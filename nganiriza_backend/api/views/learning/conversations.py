@@ -8,6 +8,8 @@ from rest_framework import status
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from api.views.ai.ollama_service import OllamaService
+from api.views.ai.services.chat import conversation_history as get_conversation_history, fallback_title, record_chat_turn
+from base.pagination import KeysetPagination
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,6 +50,7 @@ def create_conversation(request):
     parameters=[
         OpenApiParameter(name="page", location=OpenApiParameter.QUERY, required=False, type=OpenApiTypes.INT),
         OpenApiParameter(name="page_size", location=OpenApiParameter.QUERY, required=False, type=OpenApiTypes.INT),
+        OpenApiParameter(name="cursor", location=OpenApiParameter.QUERY, required=False, type=OpenApiTypes.STR),
     ],
     responses={200: dict, 404: dict},
     summary="List my conversations"
@@ -56,19 +59,11 @@ def create_conversation(request):
 @permission_classes([IsAuthenticated])
 def list_conversations(request):
     try:
-        qs = Conversations.objects.filter(user=request.user, is_deleted=False).order_by("-updated_at")
-        # simple manual pagination
-        page = int(request.GET.get("page", 1))
-        page_size = int(request.GET.get("page_size", 20))
-        start, end = (page-1)*page_size, page*page_size
-        total = qs.count()
-        serializer = ConversationsSerializer(qs[start:end], many=True, context={'request': request})
-        return Response({
-            "count": total,
-            "next": page+1 if end < total else None,
-            "previous": page-1 if start > 0 else None,
-            "results": serializer.data
-        }, status=200)
+        qs = Conversations.objects.filter(user=request.user, is_deleted=False)
+        paginator = KeysetPagination(ordering=["-last_message_at", "-pk"])
+        page = paginator.paginate_queryset(qs, request)
+        serializer = ConversationsSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data, status=200)
     except Conversations.DoesNotExist:
         return Response({"error": "No conversations found"}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -147,7 +142,7 @@ def conversation_messages(request, pk):
         if before:
             qs = qs.filter(id_number=before)
         page_size = min(int(request.GET.get("limit", 50)), 200)
-        data = MessagesSerializer(qs.order_by("-created_at")[:page_size], many=True).data
+        data = MessagesSerializer(qs.order_by("-basemodel_ptr")[:page_size], many=True).data
         return Response(list(reversed(data)), status=200)
 
     # POST create user message
@@ -155,20 +150,16 @@ def conversation_messages(request, pk):
     if not payload["content"].strip():
         return Response({"error":"content is required"}, status=400)
 
-    ser = MessagesSerializer(data=payload)
+    ser = MessageCreateSerializer(data=payload)
     ser.is_valid(raise_exception=True)
-    user_msg = ser.save(conversation=conv)
+    turn = [(ser.validated_data["role"], ser.validated_data["content"])]
+    title = None
 
     # Auto-generate assistant reply if this is a user message
-    assistant_msg = None
     if payload["role"] == "user":
         try:
             # Get conversation history (before adding current message)
-            all_messages = conv.messages.all().order_by('created_at')
-            conversation_history = [
-                {"role": msg.role, "content": msg.content}
-                for msg in all_messages
-            ]
+            conversation_history = get_conversation_history(conv)
             
             # Generate response using Ollama
             ollama_service = OllamaService()
@@ -183,50 +174,36 @@ Always respond in natural, fluent Kinyarwanda. Be empathetic, supportive, and no
             
             result = ollama_service.generate_response(
                 query=payload["content"],
-                conversation_history=conversation_history[:-1],  # Exclude current message
+                conversation_history=conversation_history,
                 system_prompt=system_prompt,
                 max_tokens=512,
                 temperature=0.7
             )
             
-            if result.get("success"):
-                # Save assistant reply
-                assistant_payload = {
-                    "role": "assistant",
-                    "content": result.get("response", "")
-                }
-                assistant_ser = MessagesSerializer(data=assistant_payload)
-                assistant_ser.is_valid(raise_exception=True)
-                assistant_msg = assistant_ser.save(conversation=conv)
+            if result.get("success") and result.get("response"):
+                # Saved below together with the user message
+                turn.append(("assistant", result["response"]))
             
-            # Generate title if this is one of the first few messages and title is empty
+            # Generate title if the conversation has none yet
             if not conv.title or conv.title.strip() == "":
-                message_count = conv.messages.filter(role='user').count()
-                if message_count >= 1:  # Generate title after 1 user message
-                    try:
-                        # Get fresh conversation history including the new assistant message
-                        all_messages_updated = conv.messages.all().order_by('created_at')
-                        full_history = [
-                            {"role": msg.role, "content": msg.content}
-                            for msg in all_messages_updated
-                        ]
-                        
-                        title = ollama_service.generate_title(full_history)
-                        if title and title.strip():
-                            conv.title = title
-                            conv.save(update_fields=['title'])
-                            logger.info(f"Generated title for conversation {conv.id}: {title}")
-                    except Exception as e:
-                        logger.warning(f"Failed to generate title: {e}")
-                        # Fallback: use first user message as title
-                        first_user_msg = conv.messages.filter(role='user').first()
-                        if first_user_msg and first_user_msg.content:
-                            conv.title = first_user_msg.content[:50]
-                            conv.save(update_fields=['title'])
+                full_history = conversation_history + [{"role": role, "content": content} for role, content in turn]
+                try:
+                    title = ollama_service.generate_title(full_history)
+                    if title and title.strip():
+                        logger.info(f"Generated title for conversation {conv.id_number}: {title}")
+                except Exception as e:
+                    logger.warning(f"Failed to generate title: {e}")
+                    # Fallback: use first user message as title
+                    title = fallback_title(full_history)
         
         except Exception as e:
             logger.error(f"Error generating assistant reply: {e}")
             # Continue even if assistant reply generation fails
+
+    # User message, assistant reply and title are written in one transaction
+    created = record_chat_turn(conv, turn, title=title if title and title.strip() else None)
+    user_msg = created[0]
+    assistant_msg = created[1] if len(created) > 1 else None
     
     response_data = {
         "user_message": MessagesSerializer(user_msg).data
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from models.moderation import get_moderation_engine
 
 
 @dataclass
@@ -7,17 +8,11 @@ class SafetyVerdict:
     flags: dict
     action: str
 
-def moderate_message(message: str) -> SafetyVerdict:
-    lowered = message.lower()
-    flags = {}
-
-    # keywords for simple content moderation
-    banned_words = ['spam', 'violence', 'abuse']
-    for word in banned_words:
-        if word in lowered:
-            flags[word] = True
-
-    # Decide allowed/action based on any flags found
-    if flags:
-        return SafetyVerdict(allowed=False, flags=flags, action='block')
-    return SafetyVerdict(allowed=True, flags={}, action='')
\ No newline at end of file
+def moderate_message(message: str, languages=None) -> SafetyVerdict:
+    """
+    Check a message against the moderation terms of every language, or only of
+    `languages` (e.g. ['kny', 'fr']), in one pass. Flags map each matched category
+    to its matched terms; any 'block' term blocks the message, 'flag' terms only flag it.
+    """
+    flags, action = get_moderation_engine().categorize(message, languages)
+    return SafetyVerdict(allowed=action != 'block', flags=flags, action=action)
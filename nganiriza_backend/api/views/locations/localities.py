@@ -0,0 +1,46 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework import status
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from base.caching import cached_response
+from models.localities import CACHE_NAMESPACE, LEVEL_NAMES, get_locality_index
+
+
+@extend_schema(
+    tags=["Public"],
+    parameters=[
+        OpenApiParameter(
+            'depth', OpenApiTypes.STR, enum=list(LEVEL_NAMES),
+            description='Deepest level to include (default: sector)'
+        ),
+    ],
+    responses={200: dict, 304: None, 400: dict}
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def locality_tree(request):
+    """
+    Rwanda's administrative hierarchy for location pickers, as nested
+    [id, name, children] lists (leaves are [id, name]) sorted by name.
+    """
+    return cached_response(request, CACHE_NAMESPACE, lambda: _build_locality_tree(request))
+
+
+def _build_locality_tree(request):
+    depth = request.GET.get('depth', 'sector')
+    if depth not in LEVEL_NAMES:
+        return Response(
+            {"error": f"depth must be one of: {', '.join(LEVEL_NAMES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # The response is cached under the current version, so never build it from a stale index
+    index = get_locality_index(max_age=0)
+    levels = LEVEL_NAMES[:LEVEL_NAMES.index(depth) + 1]
+    return Response({
+        "version": index.version,
+        "levels": list(levels),
+        "tree": index.tree(depth),
+    })
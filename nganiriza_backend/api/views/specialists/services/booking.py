@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from django.db import IntegrityError, transaction
+from models.models import Appointment, AppointmentHistory, SpecialistProfile
+
+
+class SlotUnavailable(Exception):
+    """Raised when a requested time overlaps an active appointment of the specialist"""
+
+
+def _slot_bounds(appointment_date, appointment_time, duration_minutes):
+    start = datetime.combine(appointment_date, appointment_time)
+    return start, start + timedelta(minutes=duration_minutes or 0)
+
+
+def has_conflict(specialist_id, appointment_date, appointment_time, duration_minutes, exclude_pk=None):
+    """Check whether [time, time + duration) overlaps an active appointment on that day"""
+    start, end = _slot_bounds(appointment_date, appointment_time, duration_minutes)
+    booked = Appointment.objects.filter(
+        specialist_id=specialist_id,
+        appointment_date=appointment_date,
+        status__in=Appointment.ACTIVE_STATUSES
+    )
+    if exclude_pk is not None:
+        booked = booked.exclude(pk=exclude_pk)
+
+    for other_time, other_duration in booked.values_list('appointment_time', 'duration_minutes'):
+        other_start, other_end = _slot_bounds(appointment_date, other_time, other_duration)
+        if other_start == start or (other_start < end and start < other_end):
+            return True
+    return False
+
+
+def lock_specialist(specialist_id):
+    """
+    Take a row lock on the specialist so bookings for the same calendar are serialized.
+    Must be called inside transaction.atomic(); it is a no-op on SQLite, where the
+    unique constraint on active slots is what rejects the losing writer.
+    """
+    return SpecialistProfile.objects.select_for_update().get(pk=specialist_id)
+
+
+def reserve_appointment(user, specialist, appointment_date, appointment_time, duration_minutes=30, notes=''):
+    """
+    Book a slot for `user` atomically: lock, check for overlaps, insert and record history.
+    Raises SlotUnavailable when the slot is taken, including when a concurrent booking wins the race.
+    """
+    with transaction.atomic():
+        lock_specialist(specialist.pk)
+
+        if has_conflict(specialist.pk, appointment_date, appointment_time, duration_minutes):
+            raise SlotUnavailable()
+
+        try:
+            with transaction.atomic():
+                appointment = Appointment.objects.create(
+                    name=f"Appointment - {user.username} - {appointment_date}",
+                    user=user,
+                    specialist=specialist,
+                    appointment_date=appointment_date,
+                    appointment_time=appointment_time,
+                    duration_minutes=duration_minutes,
+                    notes=notes,
+                    created_by=user,
+                    updated_by=user
+                )
+        except IntegrityError:
+            raise SlotUnavailable()
+
+        AppointmentHistory.objects.create(
+            appointment=appointment,
+            action_type='created',
+            new_date=appointment.appointment_date,
+            new_time=appointment.appointment_time,
+            new_status=appointment.status,
+            changed_by=user
+        )
+
+    return appointment
+
+
+def save_appointment(appointment, check_slot=True):
+    """
+    Save changes to an existing appointment (reschedule, re-activation) without letting
+    its new slot collide with another active booking. Raises SlotUnavailable on conflict.
+    """
+    date_field = Appointment._meta.get_field('appointment_date')
+    time_field = Appointment._meta.get_field('appointment_time')
+    appointment.appointment_date = date_field.to_python(appointment.appointment_date)
+    appointment.appointment_time = time_field.to_python(appointment.appointment_time)
+
+    with transaction.atomic():
+        if check_slot and appointment.status in Appointment.ACTIVE_STATUSES:
+            lock_specialist(appointment.specialist_id)
+            if has_conflict(
+                appointment.specialist_id,
+                appointment.appointment_date,
+                appointment.appointment_time,
+                appointment.duration_minutes,
+                exclude_pk=appointment.pk
+            ):
+                raise SlotUnavailable()
+
+        try:
+            with transaction.atomic():
+                appointment.save()
+        except IntegrityError:
+            raise SlotUnavailable()
+
+    return appointment
@@ -0,0 +1,168 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from authentication.services.emails.outbox import enqueue_emails
+from authentication.services.emails.registry import DEFAULT_LANGUAGE, preferred_languages, registry
+from authentication.services.sms.gateway import get_sms_gateway
+from models.models import Appointment, AppointmentReminder
+
+logger = logging.getLogger(__name__)
+
+# Appointments starting within this long are reminded
+LEAD_TIME = timedelta(hours=getattr(settings, 'APPOINTMENT_REMINDER_LEAD_HOURS', 24))
+# Appointments handled per query and transaction
+BATCH_SIZE = getattr(settings, 'APPOINTMENT_REMINDER_BATCH_SIZE', 500)
+
+CHANNELS = ('email', 'sms')
+
+SMS_TEMPLATES = {
+    'eng': "Nganiriza: reminder of your appointment with {specialist} on {date} at {time}.",
+    'kny': "Nganiriza: turabibutsa gahunda yanyu na {specialist} ku wa {date} saa {time}.",
+    'fr': "Nganiriza : rappel de votre rendez-vous avec {specialist} le {date} à {time}.",
+}
+
+_FIELDS = (
+    'pk', 'appointment_date', 'appointment_time', 'user_id',
+    'user__username', 'user__first_name', 'user__last_name', 'user__email', 'user__account__phone_number',
+    'specialist__specialist_account__user__username',
+    'specialist__specialist_account__user__first_name',
+    'specialist__specialist_account__user__last_name',
+)
+
+# Rows a channel can reach
+_REACHABLE = {
+    'email': ~Q(user__email=''),
+    'sms': Q(user__account__phone_number__gt=''),
+}
+
+
+def window_q(start, end):
+    """
+    Appointments whose (date, time), in local time, lies between the naive datetimes
+    `start` and `end`, written as ranges the (status, date, time) index can scan.
+    """
+    if start.date() == end.date():
+        return Q(appointment_date=start.date(), appointment_time__gte=start.time(), appointment_time__lte=end.time())
+    q = (
+        Q(appointment_date=start.date(), appointment_time__gte=start.time())
+        | Q(appointment_date=end.date(), appointment_time__lte=end.time())
+    )
+    if end.date() - start.date() > timedelta(days=1):
+        q |= Q(appointment_date__gt=start.date(), appointment_date__lt=end.date())
+    return q
+
+
+def due_reminders(channel, now=None, lead_time=LEAD_TIME):
+    """Active appointments starting within `lead_time` that have no `channel` reminder for their current slot"""
+    start = timezone.localtime(now or timezone.now()).replace(tzinfo=None)
+    reminded = AppointmentReminder.objects.filter(
+        appointment=OuterRef('pk'),
+        channel=channel,
+        appointment_date=OuterRef('appointment_date'),
+        appointment_time=OuterRef('appointment_time'),
+    )
+    return (
+        Appointment.objects
+        .filter(status__in=Appointment.ACTIVE_STATUSES)
+        .filter(window_q(start, start + lead_time))
+        .filter(_REACHABLE[channel])
+        .filter(~Exists(reminded))
+        .order_by('appointment_date', 'appointment_time', 'pk')
+    )
+
+
+def _name(row, prefix):
+    full_name = f"{row[prefix + 'first_name']} {row[prefix + 'last_name']}".strip()
+    return full_name or row[prefix + 'username']
+
+
+def _context(row):
+    return {
+        'user': _name(row, 'user__'),
+        'specialist': _name(row, 'specialist__specialist_account__user__'),
+        'date': row['appointment_date'].strftime('%Y-%m-%d'),
+        'time': row['appointment_time'].strftime('%H:%M'),
+    }
+
+
+def _record(channel, rows):
+    AppointmentReminder.objects.bulk_create([
+        AppointmentReminder(
+            appointment_id=row['pk'],
+            channel=channel,
+            appointment_date=row['appointment_date'],
+            appointment_time=row['appointment_time'],
+        )
+        for row in rows
+    ])
+
+
+def _send_email_batch(rows, languages):
+    """Returns the number of reminders that could not be sent"""
+    emails = registry.render_many(
+        'appointment_reminder', [(languages[row['user_id']], _context(row)) for row in rows]
+    )
+    # The reminders and the queued emails commit together
+    with transaction.atomic():
+        _record('email', rows)
+        enqueue_emails(
+            (row['user__email'], email.subject, email.html, email.text)
+            for row, email in zip(rows, emails)
+        )
+    return 0
+
+
+def _send_sms_batch(rows, languages, gateway):
+    """Returns the number of reminders that could not be sent"""
+    messages = []
+    for row in rows:
+        template = SMS_TEMPLATES.get(languages[row['user_id']], SMS_TEMPLATES[DEFAULT_LANGUAGE])
+        messages.append((row['user__account__phone_number'], template.format(**_context(row))))
+
+    # Recorded before sending, so a crash never sends a reminder twice
+    with transaction.atomic():
+        _record('sms', rows)
+    failed = gateway.send_many(messages)
+    if failed:
+        # Forget failed reminders so the next scan retries them
+        AppointmentReminder.objects.filter(
+            channel='sms', appointment_id__in=[rows[i]['pk'] for i in failed]
+        ).delete()
+        logger.warning(f"{len(failed)} appointment reminder SMS failed and will be retried")
+    return len(failed)
+
+
+def send_appointment_reminders(now=None, lead_time=LEAD_TIME, batch_size=BATCH_SIZE, channels=CHANNELS, gateway=None):
+    """
+    Remind every active appointment starting within `lead_time`, once per channel
+    and slot: emails go to the outbox, SMS to `gateway` (by default the configured
+    one). Each batch is one indexed scan plus a few bulk writes. Returns
+    {channel: reminders sent}.
+    """
+    if gateway is None and 'sms' in channels:
+        gateway = get_sms_gateway()
+    sent = {}
+    for channel in channels:
+        sent[channel] = 0
+        while True:
+            rows = list(due_reminders(channel, now, lead_time).values(*_FIELDS)[:batch_size])
+            if not rows:
+                break
+            languages = preferred_languages({row['user_id'] for row in rows})
+            try:
+                if channel == 'email':
+                    failed = _send_email_batch(rows, languages)
+                else:
+                    failed = _send_sms_batch(rows, languages, gateway)
+            except IntegrityError:
+                # Another scheduler recorded part of this batch first; it sends those
+                logger.info(f"Appointment {channel} reminders already taken by another worker")
+                break
+            sent[channel] += len(rows) - failed
+            # Failed rows are due again at once; leave them to the next scan
+            if failed or len(rows) < batch_size:
+                break
+    return sent
@@ -2,7 +2,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q
+from django.db.models import Q, Case, When, IntegerField
 from models.models import (
     SpecialistProfile, 
     Appointment, 
@@ -22,8 +22,24 @@ from models.serializers import (
     SpecialistMessageCreateSerializer,
     ContactedSpecialistSerializer
 )
+from django.core.exceptions import ValidationError as DjangoValidationError
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
+from authentication.services.emails.outbox import enqueue_email
+from base.authentication import current_specialist_id, principal_for
+from api.views.specialists.services.booking import (
+    SlotUnavailable,
+    reserve_appointment,
+    save_appointment
+)
+from models.search import ranked_specialist_ids
+from base.caching import cached_response
+from base.pagination import KeysetPagination
+from base.querysets import shape_queryset
+from core.database import replica_reads
+
+# Matches Appointment.Meta.ordering, with the primary key as tie-breaker for keyset pagination
+APPOINTMENT_ORDERING = ['-appointment_date', '-appointment_time', '-pk']
 
 
 @extend_schema(
@@ -36,11 +52,13 @@ def get_specialist_profile(request):
     """Get the current specialist's profile"""
     try:
         # Get account first
-        account = Account.objects.get(user=request.user, role='specialist')
+        principal = principal_for(request.user)
+        if principal.role != 'specialist':
+            raise Account.DoesNotExist
         
         # Get or create specialist profile
         specialist, created = SpecialistProfile.objects.get_or_create(
-            specialist_account=account,
+            specialist_account_id=principal.account_id,
             defaults={
                 'specialty': 'general',
                 'profile_completed': False,
@@ -75,11 +93,13 @@ def update_specialist_profile(request):
     """Update specialist profile (onboarding and profile editing)"""
     try:
         # Get account first
-        account = Account.objects.get(user=request.user, role='specialist')
+        principal = principal_for(request.user)
+        if principal.role != 'specialist':
+            raise Account.DoesNotExist
         
         # Get or create specialist profile
         specialist, created = SpecialistProfile.objects.get_or_create(
-            specialist_account=account,
+            specialist_account_id=principal.account_id,
             defaults={
                 'specialty': 'general',
                 'profile_completed': False,
@@ -130,19 +150,30 @@ def update_specialist_profile(request):
     tags=["Specialists"],
     parameters=[
         OpenApiParameter('specialty', OpenApiTypes.STR, description='Filter by specialty'),
-        OpenApiParameter('search', OpenApiTypes.STR, description='Search by name or clinic'),
+        OpenApiParameter('search', OpenApiTypes.STR, description='Search name, clinic, specialty, bio and languages (prefix, accent-insensitive)'),
         OpenApiParameter('page', OpenApiTypes.INT),
         OpenApiParameter('page_size', OpenApiTypes.INT),
+        OpenApiParameter('cursor', OpenApiTypes.STR, description='Keyset cursor from a previous page (empty for the first page)'),
     ],
-    responses={200: SpecialistPublicSerializer(many=True)}
+    responses={200: SpecialistPublicSerializer(many=True), 304: None}
 )
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@replica_reads
 def list_specialists(request):
     """List all verified specialists (public endpoint)"""
-    queryset = SpecialistProfile.objects.filter(
-        profile_completed=True
-    ).select_related('specialist_account__user')  # Optimize query
+    return cached_response(
+        request,
+        SpecialistProfile.CACHE_NAMESPACE,
+        lambda: _build_specialist_list(request)
+    )
+
+
+def _build_specialist_list(request):
+    queryset = shape_queryset(
+        SpecialistProfile.objects.filter(profile_completed=True),
+        SpecialistPublicSerializer
+    )
     
     verified_only = request.GET.get('verified_only')
     if verified_only and verified_only.lower() in ['1', 'true', 'yes']:
@@ -153,44 +184,44 @@ def list_specialists(request):
     if specialty and specialty != 'all':
         queryset = queryset.filter(specialty=specialty)
     
-    # Search
+    # Search: ranked full-text match on name, clinic, specialty, bio and languages
     search = request.GET.get('search')
     if search:
-        queryset = queryset.filter(
-            Q(specialist_account__user__first_name__icontains=search) |
-            Q(specialist_account__user__last_name__icontains=search) |
-            Q(clinic_name__icontains=search) |
-            Q(specialty__icontains=search)
+        ranked_ids = ranked_specialist_ids(search) or [None]
+        queryset = queryset.filter(id__in=ranked_ids).annotate(
+            search_rank=Case(
+                *[When(id=pk, then=position) for position, pk in enumerate(ranked_ids)],
+                output_field=IntegerField()
+            )
         )
+        paginator = KeysetPagination(ordering=['search_rank', 'pk'])
+    else:
+        paginator = KeysetPagination(ordering=['-average_rating', '-created_at', '-pk'])
     
-    # Pagination
-    page = max(int(request.GET.get('page', 1)), 1)
-    page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
-    start, end = (page - 1) * page_size, page * page_size
-    
-    total = queryset.count()
-    specialists = queryset.order_by('-average_rating', '-created_at')[start:end]
-    
+    specialists = paginator.paginate_queryset(queryset, request)
     serializer = SpecialistPublicSerializer(specialists, many=True)
-    
-    return Response({
-        'count': total,
-        'next': page + 1 if end < total else None,
-        'previous': page - 1 if start > 0 else None,
-        'results': serializer.data
-    })
+    return paginator.get_paginated_response(serializer.data)
 
 
 @extend_schema(
     tags=["Specialists"],
-    responses={200: SpecialistPublicSerializer, 404: dict}
+    responses={200: SpecialistPublicSerializer, 304: None, 404: dict}
 )
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@replica_reads
 def get_specialist_detail(request, pk):
     """Get details of a specific specialist (public)"""
+    return cached_response(
+        request,
+        SpecialistProfile.CACHE_NAMESPACE,
+        lambda: _build_specialist_detail(pk)
+    )
+
+
+def _build_specialist_detail(pk):
     try:
-        specialist = SpecialistProfile.objects.select_related('specialist_account__user').get(
+        specialist = shape_queryset(SpecialistProfile.objects, SpecialistPublicSerializer).get(
             id=pk,
             is_verified=True,
             profile_completed=True
@@ -208,31 +239,32 @@ def get_specialist_detail(request, pk):
 @extend_schema(
     tags=["Appointments"],
     request=AppointmentCreateSerializer,
-    responses={201: AppointmentSerializer, 400: dict}
+    responses={201: AppointmentSerializer, 400: dict, 409: dict}
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_appointment(request):
     """Create a new appointment"""
     serializer = AppointmentCreateSerializer(data=request.data)
-    
+
     if serializer.is_valid():
-        appointment = serializer.save(user=request.user, created_by=request.user)
-        # Ensure name field is set for BaseModel
-        if hasattr(appointment, 'name') and (not appointment.name or appointment.name.strip() == ''):
-            appointment.name = f"Appointment - {appointment.user.username} - {appointment.appointment_date}"
-            appointment.save()
-        
-        # Create initial history entry
-        AppointmentHistory.objects.create(
-            appointment=appointment,
-            action_type='created',
-            new_date=appointment.appointment_date,
-            new_time=appointment.appointment_time,
-            new_status=appointment.status,
-            changed_by=request.user
-        )
-        
+        data = serializer.validated_data
+        try:
+            # Lock, overlap check, insert and history entry in one transaction
+            appointment = reserve_appointment(
+                user=request.user,
+                specialist=data['specialist'],
+                appointment_date=data['appointment_date'],
+                appointment_time=data['appointment_time'],
+                duration_minutes=data.get('duration_minutes', 30),
+                notes=data.get('notes', '')
+            )
+        except SlotUnavailable:
+            return Response(
+                {"error": "This time slot is already booked"},
+                status=status.HTTP_409_CONFLICT
+            )
+
         return Response(
             AppointmentSerializer(appointment).data,
             status=status.HTTP_201_CREATED
@@ -246,6 +278,7 @@ def create_appointment(request):
         OpenApiParameter('status', OpenApiTypes.STR, description='Filter by status'),
         OpenApiParameter('page', OpenApiTypes.INT),
         OpenApiParameter('page_size', OpenApiTypes.INT),
+        OpenApiParameter('cursor', OpenApiTypes.STR, description='Keyset cursor from a previous page (empty for the first page)'),
     ],
     responses={200: AppointmentSerializer(many=True)}
 )
@@ -253,27 +286,17 @@ def create_appointment(request):
 @permission_classes([IsAuthenticated])
 def list_user_appointments(request):
     """List appointments for the current user"""
-    appointments = Appointment.objects.filter(user=request.user).order_by('-appointment_date')
+    appointments = shape_queryset(Appointment.objects.filter(user=request.user), AppointmentSerializer)
     
     # Filter by status
     status_filter = request.GET.get('status')
     if status_filter:
         appointments = appointments.filter(status=status_filter)
     
-    # Pagination
-    page = max(int(request.GET.get('page', 1)), 1)
-    page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
-    start, end = (page - 1) * page_size, page * page_size
-    
-    total = appointments.count()
-    serializer = AppointmentSerializer(appointments[start:end], many=True)
-    
-    return Response({
-        'count': total,
-        'next': page + 1 if end < total else None,
-        'previous': page - 1 if start > 0 else None,
-        'results': serializer.data
-    })
+    paginator = KeysetPagination(ordering=APPOINTMENT_ORDERING)
+    page = paginator.paginate_queryset(appointments, request)
+    serializer = AppointmentSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 @extend_schema(
@@ -282,6 +305,7 @@ def list_user_appointments(request):
         OpenApiParameter('status', OpenApiTypes.STR, description='Filter by status'),
         OpenApiParameter('page', OpenApiTypes.INT),
         OpenApiParameter('page_size', OpenApiTypes.INT),
+        OpenApiParameter('cursor', OpenApiTypes.STR, description='Keyset cursor from a previous page (empty for the first page)'),
     ],
     responses={200: AppointmentSerializer(many=True), 404: dict}
 )
@@ -290,30 +314,19 @@ def list_user_appointments(request):
 def list_specialist_appointments(request):
     """List appointments for the current specialist"""
     try:
-        account = Account.objects.get(user=request.user, role='specialist')
-        specialist = SpecialistProfile.objects.get(specialist_account=account)
+        specialist_id = current_specialist_id(request.user)
         
-        appointments = Appointment.objects.filter(specialist=specialist).order_by('-appointment_date')
+        appointments = shape_queryset(Appointment.objects.filter(specialist_id=specialist_id), AppointmentSerializer)
         
         # Filter by status
         status_filter = request.GET.get('status')
         if status_filter:
             appointments = appointments.filter(status=status_filter)
         
-        # Pagination
-        page = max(int(request.GET.get('page', 1)), 1)
-        page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
-        start, end = (page - 1) * page_size, page * page_size
-        
-        total = appointments.count()
-        serializer = AppointmentSerializer(appointments[start:end], many=True)
-        
-        return Response({
-            'count': total,
-            'next': page + 1 if end < total else None,
-            'previous': page - 1 if start > 0 else None,
-            'results': serializer.data
-        })
+        paginator = KeysetPagination(ordering=APPOINTMENT_ORDERING)
+        page = paginator.paginate_queryset(appointments, request)
+        serializer = AppointmentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
         
     except Account.DoesNotExist:
         return Response(
@@ -339,7 +352,7 @@ def list_specialist_appointments(request):
             'required': ['status']
         }
     },
-    responses={200: AppointmentSerializer, 400: dict, 403: dict, 404: dict}
+    responses={200: AppointmentSerializer, 400: dict, 403: dict, 404: dict, 409: dict}
 )
 @api_view(['PATCH', 'PUT'])
 @permission_classes([IsAuthenticated])
@@ -352,9 +365,7 @@ def update_appointment_status(request, pk):
         is_owner = appointment.user == request.user
         is_specialist = False
         try:
-            account = Account.objects.get(user=request.user, role='specialist')
-            specialist = SpecialistProfile.objects.get(specialist_account=account)
-            is_specialist = appointment.specialist == specialist
+            is_specialist = appointment.specialist_id == current_specialist_id(request.user)
         except (Account.DoesNotExist, SpecialistProfile.DoesNotExist):
             pass
         
@@ -396,7 +407,15 @@ def update_appointment_status(request, pk):
             if not appointment.name or appointment.name.strip() == '':
                 appointment.name = f"Appointment {appointment.id} - {appointment.user.username}"
         
-        appointment.save()
+        # Re-activating a cancelled/completed appointment must not take an already booked slot
+        reactivated = new_status in Appointment.ACTIVE_STATUSES and previous_status not in Appointment.ACTIVE_STATUSES
+        try:
+            save_appointment(appointment, check_slot=reactivated)
+        except SlotUnavailable:
+            return Response(
+                {"error": "This time slot is already booked"},
+                status=status.HTTP_409_CONFLICT
+            )
         
         # Create history entry for status change
         if previous_status != new_status:
@@ -440,7 +459,7 @@ def update_appointment_status(request, pk):
             'required': ['appointment_date', 'appointment_time']
         }
     },
-    responses={200: AppointmentSerializer, 400: dict, 403: dict, 404: dict}
+    responses={200: AppointmentSerializer, 400: dict, 403: dict, 404: dict, 409: dict}
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -451,9 +470,7 @@ def reschedule_appointment(request, pk):
         
         # Check if user is the specialist
         try:
-            account = Account.objects.get(user=request.user, role='specialist')
-            specialist = SpecialistProfile.objects.get(specialist_account=account)
-            is_specialist = appointment.specialist == specialist
+            is_specialist = appointment.specialist_id == current_specialist_id(request.user)
         except (Account.DoesNotExist, SpecialistProfile.DoesNotExist):
             is_specialist = False
         
@@ -483,7 +500,18 @@ def reschedule_appointment(request, pk):
         appointment.status = 'confirmed'  # Rescheduled appointments are confirmed
         if hasattr(appointment, 'updated_by'):
             appointment.updated_by = request.user
-        appointment.save()
+        try:
+            save_appointment(appointment)
+        except SlotUnavailable:
+            return Response(
+                {"error": "This time slot is already booked"},
+                status=status.HTTP_409_CONFLICT
+            )
+        except DjangoValidationError:
+            return Response(
+                {"error": "Invalid appointment_date or appointment_time"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         # Create history entry for reschedule
         AppointmentHistory.objects.create(
@@ -497,10 +525,8 @@ def reschedule_appointment(request, pk):
             changed_by=request.user
         )
         
-        # Send notification email to patient
+        # Queue a notification email to the patient
         try:
-            from django.core.mail import send_mail
-            from django.conf import settings
             patient_email = appointment.user.email
             if patient_email:
                 subject = f"Appointment Rescheduled - {appointment.specialist}"
@@ -518,18 +544,12 @@ Please confirm your availability for this new time.
 Thank you,
 Nganiriza Team
 """
-                send_mail(
-                    subject=subject,
-                    message=message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[patient_email],
-                    fail_silently=True
-                )
+                enqueue_email(patient_email, subject, text_body=message)
         except Exception as e:
             # Log error but don't fail the request
             import logging
             logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send reschedule notification email: {str(e)}")
+            logger.error(f"Failed to queue reschedule notification email: {str(e)}")
         
         return Response(AppointmentSerializer(appointment).data)
         
@@ -581,29 +601,21 @@ def create_review(request):
     parameters=[
         OpenApiParameter('page', OpenApiTypes.INT),
         OpenApiParameter('page_size', OpenApiTypes.INT),
+        OpenApiParameter('cursor', OpenApiTypes.STR, description='Keyset cursor from a previous page (empty for the first page)'),
     ],
     responses={200: SpecialistReviewSerializer(many=True)}
 )
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@replica_reads
 def list_specialist_reviews(request, specialist_id):
     """List reviews for a specific specialist"""
-    reviews = SpecialistReview.objects.filter(specialist_id=specialist_id).order_by('-created_at')
-    
-    # Pagination
-    page = max(int(request.GET.get('page', 1)), 1)
-    page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
-    start, end = (page - 1) * page_size, page * page_size
+    reviews = shape_queryset(SpecialistReview.objects.filter(specialist_id=specialist_id), SpecialistReviewSerializer)
     
-    total = reviews.count()
-    serializer = SpecialistReviewSerializer(reviews[start:end], many=True)
-    
-    return Response({
-        'count': total,
-        'next': page + 1 if end < total else None,
-        'previous': page - 1 if start > 0 else None,
-        'results': serializer.data
-    })
+    paginator = KeysetPagination(ordering=['-created_at', '-pk'])
+    page = paginator.paginate_queryset(reviews, request)
+    serializer = SpecialistReviewSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 @extend_schema(
@@ -618,8 +630,7 @@ def create_specialist_message(request):
     # Check if user is a specialist replying to a patient
     is_specialist_reply = False
     try:
-        account = Account.objects.get(user=request.user, role='specialist')
-        specialist = SpecialistProfile.objects.get(specialist_account=account)
+        specialist_id = current_specialist_id(request.user)
         is_specialist_reply = True
     except (Account.DoesNotExist, SpecialistProfile.DoesNotExist):
         pass
@@ -648,7 +659,7 @@ def create_specialist_message(request):
         # Create message with specialist as sender and user as recipient
         message = SpecialistMessage.objects.create(
             user=user,  # Patient receiving the message
-            specialist=specialist,  # Specialist sending the message
+            specialist_id=specialist_id,  # Specialist sending the message
             subject=subject,
             message=message_text,
             is_read=False,
@@ -682,7 +693,9 @@ def create_specialist_message(request):
 @permission_classes([IsAuthenticated])
 def list_user_messages(request):
     """List messages sent by the current user"""
-    messages = SpecialistMessage.objects.filter(user=request.user).order_by('-created_at')
+    messages = shape_queryset(
+        SpecialistMessage.objects.filter(user=request.user), SpecialistMessageSerializer
+    ).order_by('-created_at')
     
     # Pagination
     page = max(int(request.GET.get('page', 1)), 1)
@@ -709,8 +722,7 @@ def list_user_messages(request):
 def list_specialist_messages(request):
     """List messages received by the current specialist"""
     try:
-        account = Account.objects.get(user=request.user, role='specialist')
-        specialist = SpecialistProfile.objects.get(specialist_account=account)
+        specialist_id = current_specialist_id(request.user)
     except Account.DoesNotExist:
         return Response(
             {"error": "Specialist account not found"},
@@ -722,7 +734,9 @@ def list_specialist_messages(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    messages = SpecialistMessage.objects.filter(specialist=specialist).order_by('is_read', '-created_at')
+    messages = shape_queryset(
+        SpecialistMessage.objects.filter(specialist_id=specialist_id), SpecialistMessageSerializer
+    ).order_by('is_read', '-created_at')
     
     status_filter = request.GET.get('status')
     if status_filter:
@@ -758,8 +772,7 @@ def list_specialist_messages(request):
 def get_dashboard_stats(request):
     """Get dashboard statistics for specialist"""
     try:
-        account = Account.objects.get(user=request.user, role='specialist')
-        specialist = SpecialistProfile.objects.get(specialist_account=account)
+        specialist = SpecialistProfile.objects.get(pk=current_specialist_id(request.user))
         
         # Get appointment counts
         from django.utils import timezone
@@ -952,10 +965,10 @@ def get_specialist_messages(request, pk):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    messages = SpecialistMessage.objects.filter(
+    messages = shape_queryset(SpecialistMessage.objects.filter(
         user=request.user,
         specialist=specialist
-    ).order_by('created_at')
+    ), SpecialistMessageSerializer).order_by('created_at')
     
     serializer = SpecialistMessageSerializer(messages, many=True)
     return Response(serializer.data)
@@ -971,8 +984,7 @@ def get_specialist_messages(request, pk):
 def list_specialist_patients(request):
     """List all patients who have interacted with the specialist, ordered by last action"""
     try:
-        account = Account.objects.get(user=request.user, role='specialist')
-        specialist = SpecialistProfile.objects.get(specialist_account=account)
+        specialist_id = current_specialist_id(request.user)
     except Account.DoesNotExist:
         return Response(
             {"error": "Specialist account not found"},
@@ -989,11 +1001,11 @@ def list_specialist_patients(request):
     from django.db.models import Max, Q
     
     # Get users from appointments
-    appointment_users = Appointment.objects.filter(specialist=specialist).values_list('user', flat=True).distinct()
+    appointment_users = Appointment.objects.filter(specialist_id=specialist_id).values_list('user', flat=True).distinct()
     
     # Get users from messages (messages sent to specialist)
     message_users = SpecialistMessage.objects.filter(
-        specialist=specialist
+        specialist_id=specialist_id
     ).values_list('user', flat=True).distinct()
     
     # Combine and get unique users
@@ -1005,19 +1017,19 @@ def list_specialist_patients(request):
     for user in users:
         # Get last appointment
         last_appointment = Appointment.objects.filter(
-            specialist=specialist,
+            specialist_id=specialist_id,
             user=user
         ).order_by('-appointment_date', '-appointment_time').first()
         
         # Get last message (from patient to specialist)
         last_message_from_patient = SpecialistMessage.objects.filter(
-            specialist=specialist,
+            specialist_id=specialist_id,
             user=user
         ).order_by('-created_at').first()
         
         # Get last message (from specialist to patient - these are replies)
         last_message_to_patient = SpecialistMessage.objects.filter(
-            specialist=specialist,
+            specialist_id=specialist_id,
             user=user
         ).order_by('-created_at').first()
         
@@ -1045,13 +1057,13 @@ def list_specialist_patients(request):
         
         # Count unread messages and pending appointments
         unread_count = SpecialistMessage.objects.filter(
-            specialist=specialist,
+            specialist_id=specialist_id,
             user=user,
             is_read=False
         ).count()
         
         pending_appointments = Appointment.objects.filter(
-            specialist=specialist,
+            specialist_id=specialist_id,
             user=user,
             status='pending'
         ).count()
@@ -1118,9 +1130,7 @@ def get_appointment_history(request, pk):
         is_owner = appointment.user == request.user
         is_specialist = False
         try:
-            account = Account.objects.get(user=request.user, role='specialist')
-            specialist = SpecialistProfile.objects.get(specialist_account=account)
-            is_specialist = appointment.specialist == specialist
+            is_specialist = appointment.specialist_id == current_specialist_id(request.user)
         except (Account.DoesNotExist, SpecialistProfile.DoesNotExist):
             pass
         
@@ -1,45 +1,31 @@
-from django.core.mail import send_mail
-from django.conf import settings
+from authentication.services.emails.outbox import enqueue_email
+from authentication.services.emails.registry import DEFAULT_LANGUAGE, registry
 import logging
 
 logger = logging.getLogger(__name__)
 
-def send_email(recipient_email, subject, html_body):
+def send_email(recipient_email, subject, html_body, text_body=""):
+    """Queue an email for the send_queued_emails worker; returns immediately"""
     try:
-        send_mail(
-            subject=subject,
-            message="",  # plain text fallback (can be empty if only HTML)
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[recipient_email],
-            html_message=html_body,
-        )
-        logger.info(f"Email sent successfully to {recipient_email}")
+        enqueue_email(recipient_email, subject, html_body=html_body, text_body=text_body)
+        logger.info(f"Email to {recipient_email} queued")
     except Exception as e:
-        logger.error(f"Error sending email: {str(e)}")
-
-
-# Example: Reset password email
-from authentication.services.emails.templates.reset import reset_password_template
-def reset_email_password(recipient_email, employee_name, code):
-    subject = "Reset Password"
-    # Template expects {user} and {code}
-    html_body = reset_password_template.format(user=employee_name, code=code)
-    send_email(recipient_email, subject, html_body)
-
-
-# Example: New account email
-from authentication.services.emails.templates.register import register_user_template
-def new_account_email(recipient_email, client_name):
-    subject = "New account created"
-    # Template expects {user}
-    html_body = register_user_template.format(user=client_name)
-    send_email(recipient_email, subject, html_body)
-
-
-# Example: Confirm reset
-from authentication.services.emails.templates.confirm_reset import confirm_reset_template
-def confirm_reset_email(recipient_email, client_name):
-    subject = "Confirm password reset"
-    # Template expects {user}
-    html_body = confirm_reset_template.format(user=client_name)
-    send_email(recipient_email, subject, html_body)
+        logger.error(f"Error queueing email: {str(e)}")
+
+
+def send_template_email(recipient_email, name, language, context):
+    """Render a registered template in the recipient's language and queue it"""
+    email = registry.render(name, language, context)
+    send_email(recipient_email, email.subject, email.html, text_body=email.text)
+
+
+def reset_email_password(recipient_email, employee_name, code, language=DEFAULT_LANGUAGE):
+    send_template_email(recipient_email, 'reset_password', language, {'user': employee_name, 'code': code})
+
+
+def new_account_email(recipient_email, client_name, language=DEFAULT_LANGUAGE):
+    send_template_email(recipient_email, 'register', language, {'user': client_name})
+
+
+def confirm_reset_email(recipient_email, client_name, language=DEFAULT_LANGUAGE):
+    send_template_email(recipient_email, 'confirm_reset', language, {'user': client_name})
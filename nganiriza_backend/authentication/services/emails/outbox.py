@@ -0,0 +1,118 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.utils import timezone
+from models.models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Messages claimed and sent over one SMTP connection
+BATCH_SIZE = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+# Give up on a message after this many failed attempts
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+# Retry delays double from this base: 30s, 1m, 2m, 4m, ... capped below
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 60 * 60
+# How long a claimed batch stays invisible to other workers
+LEASE_SECONDS = 5 * 60
+
+
+def enqueue_email(recipient_email, subject, html_body='', text_body=''):
+    """Queue an email; it is sent by the worker, after the surrounding transaction commits"""
+    return OutboundEmail.objects.create(
+        to_email=recipient_email,
+        subject=subject[:255],
+        html_body=html_body,
+        text_body=text_body,
+    )
+
+
+def enqueue_emails(messages):
+    """Queue many (recipient email, subject, html body, text body) messages in one insert"""
+    return OutboundEmail.objects.bulk_create([
+        OutboundEmail(to_email=recipient_email, subject=subject[:255], html_body=html_body, text_body=text_body)
+        for recipient_email, subject, html_body, text_body in messages
+    ])
+
+
+def retry_delay(attempts):
+    """Backoff before attempt number `attempts` + 1"""
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim_due_emails(batch_size=BATCH_SIZE, now=None):
+    """
+    Take up to `batch_size` due messages by pushing their next attempt past the lease.
+    The claim is a short transaction, so sending never holds database locks, and
+    messages of a worker that dies become due again once the lease expires.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at', 'id')
+        # Concurrent workers skip each other's rows on PostgreSQL; SQLite serializes writers anyway
+        if db_connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        emails = list(due[:batch_size])
+        if emails:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=now + timedelta(seconds=LEASE_SECONDS)
+            )
+    return emails
+
+
+def _message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.text_body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.to_email],
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def send_due_emails(batch_size=BATCH_SIZE):
+    """
+    Send one batch of due messages over a single SMTP connection and record the
+    outcome of each. Failed messages are retried with exponential backoff until
+    MAX_ATTEMPTS. Returns the number of messages processed.
+    """
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return 0
+
+    connection = get_connection()
+    sent, failed = [], []
+    try:
+        for email in emails:
+            email.attempts += 1
+            try:
+                # Opens the connection once; send() leaves connections it did not open alone
+                connection.open()
+                _message(email, connection).send()
+            except Exception as e:
+                logger.warning(f"Sending email {email.pk} to {email.to_email} failed (attempt {email.attempts}): {e}")
+                email.last_error = str(e)[:1000]
+                if email.attempts >= MAX_ATTEMPTS:
+                    email.status = 'failed'
+                else:
+                    email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+                failed.append(email)
+                # A broken connection is reopened for the next message
+                connection.close()
+            else:
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent.append(email)
+    finally:
+        connection.close()
+
+    OutboundEmail.objects.bulk_update(
+        sent + failed, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+    )
+    return len(emails)
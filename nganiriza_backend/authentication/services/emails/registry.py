@@ -0,0 +1,119 @@
+import html
+import re
+import threading
+from collections import namedtuple
+from django.template import engines
+from django.utils.safestring import mark_safe
+from authentication.services.emails.templates.appointment_reminder import appointment_reminder_template
+from authentication.services.emails.templates.confirm_reset import confirm_reset_template
+from authentication.services.emails.templates.layout import layout_template
+from authentication.services.emails.templates.register import register_user_template
+from authentication.services.emails.templates.reset import reset_password_template
+
+DEFAULT_LANGUAGE = 'eng'
+
+# Profile.preferred_language codes -> <html lang>
+HTML_LANGUAGES = {'eng': 'en', 'kny': 'rw', 'fr': 'fr'}
+
+SOURCES = {
+    'register': register_user_template,
+    'reset_password': reset_password_template,
+    'confirm_reset': confirm_reset_template,
+    'appointment_reminder': appointment_reminder_template,
+}
+
+RenderedEmail = namedtuple('RenderedEmail', ['subject', 'html', 'text'])
+
+_BREAK_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_BLOCK_END_RE = re.compile(r'</(p|div|tr|h[1-6]|li)>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def html_to_text(fragment):
+    """Plain-text alternative of an HTML fragment: paragraphs and line breaks kept, tags dropped"""
+    text = _BLOCK_END_RE.sub('\n\n', _BREAK_RE.sub('\n', fragment))
+    text = html.unescape(_TAG_RE.sub('', text))
+    lines = (line.strip() for line in text.splitlines())
+    return _BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip() + '\n'
+
+
+class EmailTemplateRegistry:
+    """
+    Email templates compiled once per (name, language) and reused for every send.
+    Unknown languages fall back to English.
+    """
+
+    def __init__(self, sources):
+        self.sources = sources
+        self._compiled = {}
+        self._lock = threading.Lock()
+        self._layout = None
+
+    def _compile(self, source):
+        return engines['django'].from_string(source)
+
+    def template(self, name, language):
+        """(subject, body) compiled templates of `name` in `language`, with the language actually used"""
+        translations = self.sources[name]
+        if language not in translations:
+            language = DEFAULT_LANGUAGE
+        key = (name, language)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            with self._lock:
+                if self._layout is None:
+                    self._layout = self._compile(layout_template)
+                source = translations[language]
+                # Subjects are plain text: no HTML escaping
+                compiled = (
+                    self._compile('{% autoescape off %}' + source['subject'] + '{% endautoescape %}'),
+                    self._compile(source['body']),
+                    language,
+                )
+                self._compiled[key] = compiled
+        return compiled
+
+    def render(self, name, language, context):
+        """Subject, full HTML and plain text of one email"""
+        subject_template, body_template, language = self.template(name, language)
+        subject = ' '.join(subject_template.render(context).split())
+        body = body_template.render(context)
+        page = self._layout.render({
+            'html_lang': HTML_LANGUAGES.get(language, 'en'),
+            'title': subject,
+            'content': mark_safe(body),
+        })
+        return RenderedEmail(subject, page, html_to_text(body))
+
+    def render_many(self, name, items):
+        """
+        Render one email per (language, context) pair, e.g. for bulk notifications.
+        Each language is compiled at most once for the whole batch.
+        """
+        return [self.render(name, language, context) for language, context in items]
+
+    def clear(self):
+        """Drop the compiled templates, e.g. after editing the sources"""
+        with self._lock:
+            self._compiled.clear()
+            self._layout = None
+
+
+registry = EmailTemplateRegistry(SOURCES)
+
+
+def preferred_languages(user_ids):
+    """{user id: Profile.preferred_language} in one query; users without a profile get the default"""
+    from models.models import Profile
+
+    languages = dict(
+        Profile.objects.filter(user_id__in=user_ids).values_list('user_id', 'preferred_language')
+    )
+    return {user_id: languages.get(user_id) or DEFAULT_LANGUAGE for user_id in user_ids}
+
+
+def preferred_language(user):
+    if user is None or user.pk is None:
+        return DEFAULT_LANGUAGE
+    return preferred_languages([user.pk])[user.pk]
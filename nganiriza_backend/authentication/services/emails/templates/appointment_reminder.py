@@ -0,0 +1,33 @@
+# Context: user, specialist, date, time
+appointment_reminder_template = {
+    'eng': {
+        'subject': "Reminder: appointment with {{ specialist }} on {{ date }} at {{ time }}",
+        'body': """
+        <p>Dear {{ user }},</p>
+        <p>This is a reminder of your upcoming appointment with <strong>{{ specialist }}</strong>.</p>
+        <p>Date: <strong>{{ date }}</strong><br/> Time: <strong>{{ time }}</strong></p>
+        <p>If you can no longer attend, please cancel or reschedule it from your Nganiriza account.</p>
+        <p>Best regards,<br/> Nganiriza Team</p>
+        """,
+    },
+    'kny': {
+        'subject': "Kwibutsa: gahunda na {{ specialist }} ku wa {{ date }} saa {{ time }}",
+        'body': """
+        <p>Muraho {{ user }},</p>
+        <p>Turabibutsa gahunda yanyu iri imbere na <strong>{{ specialist }}</strong>.</p>
+        <p>Itariki: <strong>{{ date }}</strong><br/> Isaha: <strong>{{ time }}</strong></p>
+        <p>Niba mutakibashije kwitabira, muyihagarike cyangwa muyimure muri konti yanyu ya Nganiriza.</p>
+        <p>Itsinda rya Nganiriza</p>
+        """,
+    },
+    'fr': {
+        'subject': "Rappel : rendez-vous avec {{ specialist }} le {{ date }} à {{ time }}",
+        'body': """
+        <p>Bonjour {{ user }},</p>
+        <p>Nous vous rappelons votre prochain rendez-vous avec <strong>{{ specialist }}</strong>.</p>
+        <p>Date : <strong>{{ date }}</strong><br/> Heure : <strong>{{ time }}</strong></p>
+        <p>Si vous ne pouvez plus y assister, veuillez l'annuler ou le reporter depuis votre compte Nganiriza.</p>
+        <p>Cordialement,<br/> L'équipe Nganiriza</p>
+        """,
+    },
+}
@@ -1,26 +1,33 @@
-confirm_reset_template = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="UTF-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<meta http-equiv="X-UA-Compatible" content="ie=edge">
-<title>Password Reset Confirm</title>
-</head>
-<body style="font-family: Arial, sans-serif;">
-
-<table cellpadding="0" cellspacing="0" border="0" width="100%">
-<tr>
-    <td style="padding: 20px;">
-        <p>Dear {user},</p>
+# Context: user
+confirm_reset_template = {
+    'eng': {
+        'subject': "Confirm password reset",
+        'body': """
+        <p>Dear {{ user }},</p>
         <p>Your password was successfully changed as you requested.</p>
         <p>If you did not request for your password to be changed, contact us immediately to keep your account safe.</p>
         <p>Thank you for using Nganiriza</p>
         <p>Best regards,<br/> Nganiriza Team</p>
-    </td>
-</tr>
-</table>
-
-</body>
-</html>
-"""
\ No newline at end of file
+        """,
+    },
+    'kny': {
+        'subject': "Ijambo ry'ibanga ryahinduwe",
+        'body': """
+        <p>Muraho {{ user }},</p>
+        <p>Ijambo ry'ibanga ryanyu ryahinduwe neza nk'uko mwabisabye.</p>
+        <p>Niba atari mwe mwasabye ko rihindurwa, muhite mutumenyesha kugira ngo konti yanyu igume itekanye.</p>
+        <p>Murakoze gukoresha Nganiriza.</p>
+        <p>Itsinda rya Nganiriza</p>
+        """,
+    },
+    'fr': {
+        'subject': "Confirmation de réinitialisation du mot de passe",
+        'body': """
+        <p>Bonjour {{ user }},</p>
+        <p>Votre mot de passe a bien été modifié comme vous l'avez demandé.</p>
+        <p>Si vous n'avez pas demandé ce changement, contactez-nous immédiatement pour sécuriser votre compte.</p>
+        <p>Merci d'utiliser Nganiriza.</p>
+        <p>Cordialement,<br/> L'équipe Nganiriza</p>
+        """,
+    },
+}
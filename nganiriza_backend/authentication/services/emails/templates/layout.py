@@ -0,0 +1,23 @@
+# Shared HTML shell of every email; the per-language bodies are rendered into {{ content }}
+layout_template = """
+<!DOCTYPE html>
+<html lang="{{ html_lang }}">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<meta http-equiv="X-UA-Compatible" content="ie=edge">
+<title>{{ title }}</title>
+</head>
+<body style="font-family: Arial, sans-serif;">
+
+<table cellpadding="0" cellspacing="0" border="0" width="100%">
+<tr>
+    <td style="padding: 20px;">
+        {{ content }}
+    </td>
+</tr>
+</table>
+
+</body>
+</html>
+"""
@@ -1,25 +1,30 @@
-register_user_template = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="UTF-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<meta http-equiv="X-UA-Compatible" content="ie=edge">
-<title>New account registration</title>
-</head>
-<body style="font-family: Arial, sans-serif;">
-
-<table cellpadding="0" cellspacing="0" border="0" width="100%">
-<tr>
-    <td style="padding: 20px;">
-        <p>Dear {user}, Welcome to the Nganiriza Community!</p>
+# Context: user
+register_user_template = {
+    'eng': {
+        'subject': "New account created",
+        'body': """
+        <p>Dear {{ user }}, Welcome to the Nganiriza Community!</p>
         <p>Your account was successfully created with Nganiriza.</p>
         <p>We are committed to providing you with the best experience possible. If you have any questions or need assistance, please don't hesitate to reach out.</p>
         <p>Best regards,<br/> Nganiriza Team</p>
-    </td>
-</tr>
-</table>
-
-</body>
-</html>
-"""
\ No newline at end of file
+        """,
+    },
+    'kny': {
+        'subject': "Konti nshya yafunguwe",
+        'body': """
+        <p>Muraho {{ user }}, murakaza neza mu muryango wa Nganiriza!</p>
+        <p>Konti yanyu yafunguwe neza kuri Nganiriza.</p>
+        <p>Twiyemeje kubaha serivisi nziza zishoboka. Niba mufite ikibazo cyangwa mukeneye ubufasha, ntimutinye kutwandikira.</p>
+        <p>Murakoze,<br/> Itsinda rya Nganiriza</p>
+        """,
+    },
+    'fr': {
+        'subject': "Nouveau compte créé",
+        'body': """
+        <p>Bonjour {{ user }}, bienvenue dans la communauté Nganiriza !</p>
+        <p>Votre compte Nganiriza a été créé avec succès.</p>
+        <p>Nous nous engageons à vous offrir la meilleure expérience possible. Si vous avez des questions ou besoin d'aide, n'hésitez pas à nous contacter.</p>
+        <p>Cordialement,<br/> L'équipe Nganiriza</p>
+        """,
+    },
+}
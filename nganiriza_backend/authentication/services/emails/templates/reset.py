@@ -1,27 +1,36 @@
-reset_password_template = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="UTF-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<meta http-equiv="X-UA-Compatible" content="ie=edge">
-<title>Password Reset OTP</title>
-</head>
-<body style="font-family: Arial, sans-serif;">
-
-<table cellpadding="0" cellspacing="0" border="0" width="100%">
-<tr>
-    <td style="padding: 20px;">
-        <p>Dear {user},</p>
+# Context: user, code
+reset_password_template = {
+    'eng': {
+        'subject': "Reset Password",
+        'body': """
+        <p>Dear {{ user }},</p>
         <p>You have requested to reset your password for your Nganiriza account.</p>
-        <p>Your One-Time Password (OTP) for password reset is: <strong>{code}</strong></p>
+        <p>Your One-Time Password (OTP) for password reset is: <strong>{{ code }}</strong></p>
         <p>If you did not request this password reset, please ignore this email or contact our support team immediately.</p>
         <p>Thank you.</p>
         <p>Best regards,<br/> Nganiriza Team</p>
-    </td>
-</tr>
-</table>
-
-</body>
-</html>
-"""
\ No newline at end of file
+        """,
+    },
+    'kny': {
+        'subject': "Guhindura ijambo ry'ibanga",
+        'body': """
+        <p>Muraho {{ user }},</p>
+        <p>Mwasabye guhindura ijambo ry'ibanga rya konti yanyu ya Nganiriza.</p>
+        <p>Kode yanyu y'inshuro imwe (OTP) yo guhindura ijambo ry'ibanga ni: <strong>{{ code }}</strong></p>
+        <p>Niba atari mwe mwabisabye, mwirengagize iyi imeri cyangwa muhite mumenyesha itsinda ryacu ry'ubufasha.</p>
+        <p>Murakoze.</p>
+        <p>Itsinda rya Nganiriza</p>
+        """,
+    },
+    'fr': {
+        'subject': "Réinitialisation du mot de passe",
+        'body': """
+        <p>Bonjour {{ user }},</p>
+        <p>Vous avez demandé la réinitialisation du mot de passe de votre compte Nganiriza.</p>
+        <p>Votre code à usage unique (OTP) est : <strong>{{ code }}</strong></p>
+        <p>Si vous n'êtes pas à l'origine de cette demande, ignorez cet e-mail ou contactez immédiatement notre équipe d'assistance.</p>
+        <p>Merci.</p>
+        <p>Cordialement,<br/> L'équipe Nganiriza</p>
+        """,
+    },
+}
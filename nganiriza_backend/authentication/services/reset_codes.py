@@ -0,0 +1,80 @@
+import hashlib
+import hmac
+import secrets
+import string
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from models.models import ResetPassword
+
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+# How long a code stays valid
+CODE_TTL = timedelta(minutes=getattr(settings, 'PASSWORD_RESET_CODE_MINUTES', 5))
+# Wrong guesses after which a code is void
+MAX_ATTEMPTS = getattr(settings, 'PASSWORD_RESET_CODE_MAX_ATTEMPTS', 5)
+
+
+class InvalidResetCode(Exception):
+    """Raised when a reset code is wrong, expired, used up or was never issued"""
+
+
+def _normalize(email):
+    return str(email).strip().lower()
+
+
+def _hash(email, code):
+    # Keyed, so a copy of the table cannot be brute-forced without the secret key
+    message = f"{email}:{str(code).strip().upper()}".encode('utf-8')
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def issue_code(email, now=None):
+    """
+    Create a reset code for `email` and return it in clear, for the email only.
+    Replaces the address's previous code, so at most one is ever active.
+    """
+    now = now or timezone.now()
+    email = _normalize(email)
+    code = ''.join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+    ResetPassword.objects.update_or_create(
+        email=email,
+        defaults={'code_hash': _hash(email, code), 'expires': now + CODE_TTL, 'attempts': 0, 'created_at': now},
+    )
+    return code
+
+
+def verify_code(email, code, now=None):
+    """
+    Check and consume the reset code of `email`. The comparison takes the same
+    time whether or not the address has a code; a wrong guess counts towards
+    MAX_ATTEMPTS. Raises InvalidResetCode on failure.
+    """
+    now = now or timezone.now()
+    email = _normalize(email)
+    candidate = _hash(email, code)
+    entry = ResetPassword.objects.filter(email=email).first()
+
+    stored = entry.code_hash if entry is not None else _hash(email, secrets.token_hex(8))
+    matches = hmac.compare_digest(candidate, stored)
+    if entry is None:
+        raise InvalidResetCode("Invalid or expired reset code")
+    if entry.expires <= now:
+        raise InvalidResetCode("The reset code has expired")
+    if entry.attempts >= MAX_ATTEMPTS:
+        raise InvalidResetCode("Too many wrong codes; please request a new one")
+    if not matches:
+        ResetPassword.objects.filter(pk=entry.pk).update(attempts=F('attempts') + 1)
+        raise InvalidResetCode("Invalid or expired reset code")
+
+    # Consumed exactly once, even if two confirmations race
+    if not ResetPassword.objects.filter(pk=entry.pk, code_hash=stored).delete()[0]:
+        raise InvalidResetCode("Invalid or expired reset code")
+
+
+def purge_expired_codes(now=None):
+    """Delete expired codes with one range delete on the expires index; returns the count"""
+    now = now or timezone.now()
+    deleted, _ = ResetPassword.objects.filter(expires__lte=now).delete()
+    return deleted
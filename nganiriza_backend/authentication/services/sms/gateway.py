@@ -0,0 +1,33 @@
+import logging
+from abc import ABC, abstractmethod
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class SMSGateway(ABC):
+    """
+    Sends text messages. Providers subclass this and implement send_many;
+    settings.SMS_GATEWAY names the class to use.
+    """
+
+    @abstractmethod
+    def send_many(self, messages):
+        """
+        Send (phone number, text) pairs, ideally in one provider call.
+        Returns the set of indexes into `messages` that could not be sent.
+        """
+
+
+class ConsoleSMSGateway(SMSGateway):
+    """Local stand-in that logs messages instead of sending them"""
+
+    def send_many(self, messages):
+        for phone_number, text in messages:
+            logger.info(f"SMS to {phone_number}: {text}")
+        return set()
+
+
+def get_sms_gateway():
+    return import_string(getattr(settings, 'SMS_GATEWAY', 'authentication.services.sms.gateway.ConsoleSMSGateway'))()
@@ -0,0 +1,193 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# How long the shared cache keeps a principal; changes delete it straight away
+PRINCIPAL_CACHE_TIMEOUT = getattr(settings, 'AUTH_PRINCIPAL_CACHE_TIMEOUT', 5 * 60)
+# How long a process reuses a principal without asking the shared cache. Other
+# processes see a role change or deactivation after at most this long
+PRINCIPAL_LOCAL_TIMEOUT = getattr(settings, 'AUTH_PRINCIPAL_LOCAL_TIMEOUT', 5)
+PRINCIPAL_LOCAL_SIZE = 10000
+# How long verified basic-auth credentials are accepted without hashing the password again
+BASIC_AUTH_CACHE_TIMEOUT = getattr(settings, 'BASIC_AUTH_CACHE_TIMEOUT', 60)
+
+# User fields kept in the cached principal. Everything else, the password hash
+# included, is deferred and loaded from the database if a caller touches it
+PRINCIPAL_USER_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser')
+
+# `role` and `account_id` are None without an Account; `specialist_id` is only set for
+# specialists. `password_digest` is simplejwt's digest of the password hash, which
+# token revocation and the basic-auth cache compare against
+Principal = namedtuple('Principal', ['user', 'role', 'account_id', 'specialist_id', 'password_digest'], defaults=(None,))
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _cache_key(user_id):
+    return f"principal:{user_id}"
+
+
+def _load_principal(user_id):
+    """The cacheable form of a principal: plain values only, None for unknown users"""
+    from models.models import Account
+
+    user = get_user_model().objects.filter(pk=user_id).values(*PRINCIPAL_USER_FIELDS, 'password').first()
+    if user is None:
+        return None
+    password_digest = get_md5_hash_password(user.pop('password'))
+    account = Account.objects.filter(user_id=user_id).values_list('pk', 'role', 'specialist_profile').first()
+    account_id, role, specialist_id = account or (None, None, None)
+    return {
+        'user': user,
+        'role': role,
+        'account_id': account_id,
+        'specialist_id': specialist_id if role == 'specialist' else None,
+        'password_digest': password_digest,
+    }
+
+
+def _principal(entry):
+    User = get_user_model()
+    fields = entry['user']
+    # A user as loaded by .only(*PRINCIPAL_USER_FIELDS); save() writes only these fields.
+    # from_db takes the values in the model's field order
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in fields]
+    user = User.from_db('default', names, [fields[name] for name in names])
+    return Principal(user, entry['role'], entry['account_id'], entry['specialist_id'], entry['password_digest'])
+
+
+def get_principal(user_id):
+    """
+    The user with their account role and specialist profile id, from a short-lived
+    process cache, then the shared cache, then the database. None for unknown users.
+    Every call builds its own user, so callers may modify it.
+    """
+    # Tokens may carry the id as a string
+    user_id = str(user_id)
+    now = time.monotonic()
+    with _local_lock:
+        local = _local.get(user_id)
+    if local is not None and local[0] > now:
+        entry = local[1]
+    else:
+        entry = cache.get(_cache_key(user_id))
+        if entry is None:
+            entry = _load_principal(user_id)
+            if entry is None:
+                return None
+            cache.set(_cache_key(user_id), entry, PRINCIPAL_CACHE_TIMEOUT)
+        with _local_lock:
+            _local[user_id] = (now + PRINCIPAL_LOCAL_TIMEOUT, entry)
+            _local.move_to_end(user_id)
+            while len(_local) > PRINCIPAL_LOCAL_SIZE:
+                _local.popitem(last=False)
+    return _principal(entry)
+
+
+def invalidate_principal(user_id):
+    """Forget a user's cached principal, e.g. after a role or active-status change"""
+    user_id = str(user_id)
+    with _local_lock:
+        _local.pop(user_id, None)
+    cache.delete(_cache_key(user_id))
+
+
+def principal_for(user):
+    """Principal of an authenticated user, resolved once per request"""
+    principal = getattr(user, 'principal', None)
+    if principal is None:
+        principal = get_principal(user.pk) or Principal(user, None, None, None)
+        user.principal = principal
+    return principal
+
+
+def current_specialist_id(user):
+    """
+    SpecialistProfile id of the authenticated specialist. Like the lookups it replaces,
+    raises Account.DoesNotExist for users without a specialist account and
+    SpecialistProfile.DoesNotExist for specialists without a profile.
+    """
+    from models.models import Account, SpecialistProfile
+
+    principal = principal_for(user)
+    if principal.role != 'specialist':
+        raise Account.DoesNotExist("Specialist account not found")
+    if principal.specialist_id is None:
+        raise SpecialistProfile.DoesNotExist("Specialist profile not found")
+    return principal.specialist_id
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user through the principal cache instead of
+    a query per request, and attaches the principal as `request.user.principal`.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        principal = get_principal(user_id)
+        if principal is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        user = principal.user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != principal.password_digest:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        user.principal = principal
+        return user
+
+
+def _credentials_key(userid, password):
+    # Keyed with the secret key, so cache contents reveal nothing about the password
+    digest = hmac.new(settings.SECRET_KEY.encode(), f"{userid}\0{password}".encode(), hashlib.sha256).hexdigest()
+    return f"basic-auth:{digest}"
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication that remembers verified credentials for BASIC_AUTH_CACHE_TIMEOUT
+    seconds, so repeat callers skip the deliberately slow password hash. A cached
+    entry only holds while the user's username and stored password hash are
+    unchanged and the user is active; failed attempts are never cached.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        key = _credentials_key(userid, password)
+        verified = cache.get(key)
+        if verified is not None:
+            user_id, password_digest = verified
+            principal = get_principal(user_id)
+            if (
+                principal is not None
+                and principal.user.is_active
+                and principal.user.get_username() == userid
+                and principal.password_digest == password_digest
+            ):
+                user = principal.user
+                user.principal = principal
+                return (user, None)
+            cache.delete(key)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        cache.set(key, (user.pk, get_md5_hash_password(user.password)), BASIC_AUTH_CACHE_TIMEOUT)
+        return (user, auth)
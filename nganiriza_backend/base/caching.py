@@ -0,0 +1,101 @@
+import hashlib
+import json
+import time
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+# Cached payloads are also invalidated by version bumps, the timeout only bounds staleness of unused keys
+DEFAULT_RESPONSE_TIMEOUT = 60 * 10
+
+
+def _version_key(namespace):
+    return f"version:{namespace}"
+
+
+def get_version(namespace):
+    """
+    Current version stamp of a cached namespace. The stamp is the time of the last
+    change in milliseconds, so it also serves as the Last-Modified date and never
+    goes backwards even if the cache evicts it.
+    """
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        version = int(time.time() * 1000)
+        cache.add(_version_key(namespace), version, timeout=None)
+        version = cache.get(_version_key(namespace), version)
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every cached response of a namespace"""
+    version = max(int(time.time() * 1000), (cache.get(_version_key(namespace)) or 0) + 1)
+    cache.set(_version_key(namespace), version, timeout=None)
+    return version
+
+
+def compute_etag(data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return quote_etag(hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32])
+
+
+def _request_key(namespace, version, request):
+    params = '&'.join(f"{k}={v}" for k, v in sorted(request.GET.lists()))
+    digest = hashlib.sha256(f"{request.path}?{params}".encode('utf-8')).hexdigest()
+    return f"response:{namespace}:{version}:{digest}"
+
+
+def _is_not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def cached_response(request, namespace, build, timeout=DEFAULT_RESPONSE_TIMEOUT):
+    """
+    Serve a public GET response from cache, keyed by namespace version, path and query string.
+
+    `build` is only called on a cache miss and must return a Response; only 200s are cached.
+    Adds ETag/Last-Modified and answers 304 to matching conditional requests.
+    """
+    version = get_version(namespace)
+    key = _request_key(namespace, version, request)
+    entry = cache.get(key)
+
+    if entry is None:
+        response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        entry = {'data': response.data, 'etag': compute_etag(response.data)}
+        cache.set(key, entry, timeout)
+
+    last_modified = version // 1000
+    if _is_not_modified(request, entry['etag'], last_modified):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(entry['data'])
+
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(last_modified)
+    # Let browsers and the PWA keep a copy but revalidate it on every use
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def cached_count(queryset, timeout=60):
+    """
+    queryset.count() memoized for `timeout` seconds, keyed by the SQL of the query.
+    Good enough for pagination totals on large tables, where an exact figure is not worth a scan.
+    """
+    key = f"count:{hashlib.sha256(str(queryset.query).encode('utf-8')).hexdigest()}"
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout)
+    return total
@@ -0,0 +1,64 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+LAYOUTS = ('csv', 'jsonl')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class _Echo:
+    """File-like object whose write returns the line, for csv.writer into a generator"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return value
+
+
+def export_lines(records, fields, layout):
+    """
+    Yield `records` (dicts keyed by `fields`) as CSV lines with a header, or as
+    JSON lines. Nested values become JSON strings in CSV.
+    """
+    if layout == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for record in records:
+            yield writer.writerow([_csv_value(record.get(field)) for field in fields])
+        return
+
+    for record in records:
+        yield json.dumps({field: record.get(field) for field in fields}, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def streaming_export(records, fields, layout, filename):
+    """
+    Download response streaming `records` as they are produced, so exports of
+    large tables never hold more than one database chunk in memory.
+    """
+    response = StreamingHttpResponse(export_lines(records, fields, layout), content_type=CONTENT_TYPES[layout])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{layout}"'
+    return response
+
+
+def chunked(iterable, size):
+    """Lists of up to `size` consecutive items"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
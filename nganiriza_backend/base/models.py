@@ -1,6 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils.text import slugify
+import secrets
+
+SLUG_SUFFIX_BYTES = 3
+
+
+def suffixed_slug(slug, max_length=50):
+    """`slug` with a random hex suffix, truncated so the result fits in max_length"""
+    suffix = secrets.token_hex(SLUG_SUFFIX_BYTES)
+    base = slug[:max_length - len(suffix) - 1].rstrip('-')
+    return f"{base}-{suffix}" if base else suffix
 
 
 class BaseModel(models.Model):
@@ -17,17 +27,17 @@ class BaseModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            original_slug = slugify(self.name)
-            unique_slug = original_slug
-            num = 1
-
-            while self.__class__.objects.filter(slug=unique_slug).exists():
-                unique_slug = f"{original_slug}-{num}"
-                num += 1
+    # Models whose slugs are never shown or looked up skip generating them
+    GENERATE_SLUG = True
 
-            self.slug = unique_slug
+    def save(self, *args, **kwargs):
+        if not self.slug and self.GENERATE_SLUG:
+            slug = slugify(self.name)[:self._meta.get_field('slug').max_length]
+            # One lookup at most: the first object with a name gets the plain slug,
+            # later ones a random suffix instead of probing slug-1, slug-2, ...
+            if not slug or self.__class__.objects.filter(slug=slug).exists():
+                slug = suffixed_slug(slug, self._meta.get_field('slug').max_length)
+            self.slug = slug
 
         super().save(*args, **kwargs)
 
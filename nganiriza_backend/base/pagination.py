@@ -1,6 +1,179 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from base.caching import cached_count
 
 class SmallResultsSetPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over an explicit ordering.
+
+    `ordering` lists the ordering columns, e.g. ['-appointment_date', '-pk']; the
+    last one must be unique and none of them nullable. Every page is fetched with
+    a `WHERE (ordering columns) < (last row seen)` filter, so a deep page costs
+    the same as the first one.
+
+    Requests with a `cursor` parameter (empty for the first page) are paginated by
+    keyset and answer `next`/`previous` cursors. Requests without one keep the
+    `page` number contract ({count, next, previous, results}) and also get a
+    `next_cursor` to switch over. `count` is 'exact', 'cached' (approximate,
+    memoized for a short while) or None to skip counting; in cursor mode the count
+    is only computed when `include_count` is passed.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'include_count'
+
+    def __init__(self, ordering, count='exact'):
+        self.ordering = list(ordering)
+        self.count = count
+
+    def _fields(self, reverse=False):
+        for spec in self.ordering:
+            name = spec.lstrip('-')
+            descending = spec.startswith('-') != reverse
+            yield name, descending
+
+    def _order_by(self, reverse=False):
+        return [f"-{name}" if descending else name for name, descending in self._fields(reverse)]
+
+    def _values(self, instance):
+        values = []
+        for name, _ in self._fields():
+            value = instance
+            for attr in name.split('__'):
+                value = getattr(value, attr)
+            values.append(_encode_value(value))
+        return values
+
+    def _after(self, values, reverse=False):
+        """Rows strictly after `values` in the (possibly reversed) ordering"""
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self._fields(reverse), values):
+            condition |= Q(**equal) & Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            equal[name] = value
+        return condition
+
+    def encode_cursor(self, instance, reverse=False):
+        payload = {'v': self._values(instance)}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            payload = json.loads(raw)
+            values = payload['v']
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError(token)
+            return values, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound("Invalid cursor")
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        self.total = None
+
+        if self.cursor_mode:
+            return self._paginate_by_cursor(queryset, request)
+        return self._paginate_by_page(queryset, request)
+
+    def _count(self, queryset):
+        if self.count == 'cached':
+            return cached_count(queryset)
+        return queryset.count()
+
+    def _paginate_by_page(self, queryset, request):
+        try:
+            self.page_number = _positive_int(request.query_params.get(self.page_query_param, 1), strict=True)
+        except ValueError:
+            self.page_number = 1
+        start = (self.page_number - 1) * self.page_size_value
+
+        if self.count:
+            self.total = self._count(queryset)
+        rows = list(queryset.order_by(*self._order_by())[start:start + self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        self.page = rows[:self.page_size_value]
+        self.has_previous = start > 0
+        return self.page
+
+    def _paginate_by_cursor(self, queryset, request):
+        token = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if token:
+            values, reverse = self.decode_cursor(token)
+            queryset_page = queryset.filter(self._after(values, reverse))
+        else:
+            queryset_page = queryset
+
+        if self.count and request.query_params.get(self.count_query_param) in ('1', 'true', 'yes'):
+            self.total = self._count(queryset)
+
+        rows = list(queryset_page.order_by(*self._order_by(reverse))[:self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(token)
+        self.page = rows
+        return self.page
+
+    def get_paginated_data(self, data):
+        next_cursor = self.encode_cursor(self.page[-1]) if self.has_next and self.page else None
+        if self.cursor_mode:
+            previous_cursor = self.encode_cursor(self.page[0], reverse=True) if self.has_previous and self.page else None
+            result = {'next': next_cursor, 'previous': previous_cursor, 'results': data}
+            if self.total is not None:
+                result['count'] = self.total
+            return result
+
+        return {
+            'count': self.total,
+            'next': self.page_number + 1 if self.has_next else None,
+            'previous': self.page_number - 1 if self.has_previous else None,
+            'next_cursor': next_cursor,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data, **kwargs):
+        return Response(self.get_paginated_data(data), **kwargs)
@@ -7,3 +7,8 @@ class IsSpecialist(permissions.BasePermission):
 class IsUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.groups.filter(name='User').exists()
+
+class IsSuperUser(permissions.BasePermission):
+    """Admins of the platform; is_staff alone also covers specialists"""
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.is_superuser)
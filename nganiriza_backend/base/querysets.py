@@ -0,0 +1,83 @@
+from django.db import connection, connections, router, transaction
+from django.db.models import Q
+
+
+def _declared(serializer_class, option):
+    meta = getattr(serializer_class, 'Meta', None)
+    return tuple(getattr(meta, option, ()))
+
+
+def shape_queryset(queryset, serializer_class):
+    """
+    Apply the joins a serializer needs to render a row without extra queries.
+
+    Serializers list the relations their fields and SerializerMethodFields walk
+    in `Meta.select_related` (forward foreign keys, joined in the same query) and
+    `Meta.prefetch_related` (reverse and many-to-many relations, one extra query
+    per relation), so the views listing them never have to keep that in sync.
+    """
+    select_related = _declared(serializer_class, 'select_related')
+    prefetch_related = _declared(serializer_class, 'prefetch_related')
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+def bulk_create_with_parent(objs):
+    """
+    bulk_create for models inheriting from a concrete parent such as BaseModel,
+    which Django's bulk_create refuses.
+
+    Inserts the parent rows in one statement (their ids come back through
+    RETURNING), then the child rows in a second one. Like bulk_create it sends
+    no signals and skips save(), so BaseModel slugs are not generated.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+
+    model = type(objs[0])
+    (parent_model, parent_link), = model._meta.parents.items()
+    using = router.db_for_write(model)
+    parent_fields = parent_model._meta.concrete_fields
+    parents = [
+        parent_model(**{f.attname: getattr(obj, f.attname) for f in parent_fields if not f.primary_key})
+        for obj in objs
+    ]
+
+    with transaction.atomic(using=using, savepoint=False):
+        if connections[using].features.can_return_rows_from_bulk_insert:
+            parent_model._base_manager.using(using).bulk_create(parents)
+        else:
+            for parent in parents:
+                parent.save_base(using=using, raw=True, force_insert=True)
+
+        for obj, parent in zip(objs, parents):
+            for field in parent_fields:
+                setattr(obj, field.attname, getattr(parent, field.attname))
+            setattr(obj, parent_link.attname, parent.pk)
+
+        local_fields = [f for f in model._meta.local_concrete_fields if not f.generated]
+        model._base_manager.using(using)._insert(objs, fields=local_fields, using=using)
+
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = using
+    return objs
+
+
+def prefix_q(field, prefix):
+    """
+    Q matching values of `field` that start with `prefix`, in a form the
+    field's index can serve whatever collation the column uses.
+    """
+    if connection.vendor == 'sqlite':
+        # SQLite compares text by code point, so the prefix with its last
+        # character bumped is the first value past every match
+        return Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix[:-1] + chr(ord(prefix[-1]) + 1)})
+    # Range bounds would follow the column's collation, where en_US or ICU can
+    # sort punctuation and letters in any order; LIKE 'prefix%' does not, and
+    # PostgreSQL serves it from a varchar_pattern_ops index
+    return Q(**{f"{field}__startswith": prefix})
@@ -0,0 +1,164 @@
+import hashlib
+import math
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle, UserRateThrottle
+
+
+def client_ip(request):
+    """
+    Client address: REMOTE_ADDR, or the X-Forwarded-For entry added by the
+    outermost of REST_FRAMEWORK['NUM_PROXIES'] trusted proxies. Entries a client
+    wrote into the header itself are never used.
+    """
+    return BaseThrottle().get_ident(request)
+
+
+class SlidingWindowLimiter:
+    """
+    At most `limit` events per `window` seconds for each key, counted in the
+    RateLimitCounter table so every worker sees the same totals.
+
+    Counts are kept per fixed window; the previous window is weighted by how much
+    of it still overlaps the sliding window, which approximates a true sliding log
+    with two counters per key.
+
+    An event is counted before it is judged, with an UPDATE ... SET count =
+    count + 1 that the database applies atomically, so a burst spread over
+    several workers cannot all pass a check before any of them is counted. The
+    shared cache is not used: DatabaseCache's incr is a read followed by a write,
+    and concurrent hits would overwrite each other.
+    """
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    @classmethod
+    def from_settings(cls, scope):
+        """Limiter configured by settings.AUTH_RATE_LIMITS[scope] = (limit, window seconds)"""
+        limit, window = settings.AUTH_RATE_LIMITS[scope]
+        return cls(scope, limit, window)
+
+    def _keys(self, key, now):
+        digest = hashlib.sha256(str(key).encode('utf-8')).hexdigest()[:32]
+        bucket = int(now // self.window)
+        prefix = f"{self.scope}:{digest}"
+        return f"{prefix}:{bucket - 1}", f"{prefix}:{bucket}"
+
+    def _counts(self, key, now):
+        from models.models import RateLimitCounter
+
+        previous_key, current_key = self._keys(key, now)
+        counts = dict(RateLimitCounter.objects.filter(key__in=[previous_key, current_key]).values_list('key', 'count'))
+        return counts.get(previous_key, 0), counts.get(current_key, 0)
+
+    def _estimate(self, previous, current, now):
+        overlap = 1 - (now % self.window) / self.window
+        return previous * overlap + current
+
+    def _wait(self, previous, current, now):
+        """Seconds until the estimate leaves room for one more event; 0 when it does now"""
+        if self._estimate(previous, current, now) < self.limit:
+            return 0
+        into_window = now % self.window
+        if current < self.limit and previous:
+            # Wait for the previous window's weight to fall below the remaining allowance
+            free_at = (1 - (self.limit - current) / previous) * self.window
+            return max(1, math.ceil(free_at - into_window))
+        # The current window alone is over the limit: it becomes the weighted previous one
+        free_at = self.window + (1 - self.limit / current) * self.window
+        return max(1, math.ceil(free_at - into_window))
+
+    def _add(self, key, now, amount):
+        from models.models import RateLimitCounter
+
+        _, current_key = self._keys(key, now)
+        counters = RateLimitCounter.objects.filter(key=current_key)
+        if amount < 0:
+            counters.filter(count__gte=-amount).update(count=F('count') + amount)
+            return
+        if counters.update(count=F('count') + amount):
+            return
+        # Counters outlive their window by one more, while they still weigh on the next
+        expires = datetime.fromtimestamp((int(now // self.window) + 2) * self.window, tz=dt_timezone.utc)
+        try:
+            with transaction.atomic():
+                RateLimitCounter.objects.create(key=current_key, count=amount, expires=expires)
+        except IntegrityError:
+            # Created by a concurrent hit in between
+            counters.update(count=F('count') + amount)
+            return
+        # A new window: drop the ones no longer weighing on any key
+        RateLimitCounter.objects.filter(expires__lte=datetime.fromtimestamp(now, tz=dt_timezone.utc)).delete()
+
+    def retry_after(self, key, now=None):
+        """Seconds until one more event is allowed; 0 when it is allowed now. Counts nothing"""
+        now = time.time() if now is None else now
+        return self._wait(*self._counts(key, now), now)
+
+    def hit(self, key, now=None):
+        """
+        Count one event for `key`, then judge it: returns 0 when it is within
+        the limit, otherwise the seconds to wait. Rejected events are taken back,
+        so retrying after the wait succeeds.
+        """
+        now = time.time() if now is None else now
+        self._add(key, now, 1)
+        previous, current = self._counts(key, now)
+        # This event is already in `current`: it is allowed if the others left room for it
+        if self._estimate(previous, current - 1, now) < self.limit:
+            return 0
+        self._add(key, now, -1)
+        return self._wait(previous, current - 1, now)
+
+    def refund(self, key, now=None):
+        """Take back one event counted by hit(), e.g. an attempt that turned out to be legitimate"""
+        now = time.time() if now is None else now
+        self._add(key, now, -1)
+
+    def reset(self, key, now=None):
+        from models.models import RateLimitCounter
+
+        now = time.time() if now is None else now
+        RateLimitCounter.objects.filter(key__in=self._keys(key, now)).delete()
+
+
+def too_many_attempts(retry_after):
+    """429 response asking the client to wait `retry_after` seconds"""
+    return Response(
+        {"error": "Too many attempts. Please try again later.", "retry_after": retry_after},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={'Retry-After': str(retry_after)},
+    )
+
+
+def hit_limits(*checks):
+    """
+    Count one event on each (limiter, key) pair and return the longest wait, or
+    0 when every one is within its limit. Pairs with an empty key are skipped.
+    """
+    return max([limiter.hit(key) for limiter, key in checks if key], default=0)
+
+
+class LocalUserRateThrottle(UserRateThrottle):
+    """
+    The general request throttle for signed-in users, counted in each process's
+    memory (the 'throttle' cache) so ordinary requests pay no cache round trip.
+    Limits are per worker; the login, signup and reset limits above are the shared ones.
+    """
+    cache = caches['throttle']
+
+    def get_cache_key(self, request, view):
+        # Anonymous endpoints carry their own limits; throttling them per address
+        # would also throttle every client behind a shared carrier NAT
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return super().get_cache_key(request, view)
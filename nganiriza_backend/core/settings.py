@@ -2,6 +2,7 @@ from datetime import timedelta
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from core.database import parse_database_url
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -124,13 +125,30 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///db.sqlite3')
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+
+# Persistent connections with a liveness check before reuse (ignored by SQLite).
+# DB_POOL=1 switches to the psycopg 3 connection pool instead.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+DB_POOL = os.getenv('DB_POOL', '0').lower() in ('1', 'true', 'yes')
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': parse_database_url(
+        DATABASE_URL, BASE_DIR,
+        conn_max_age=DB_CONN_MAX_AGE, health_checks=True, pool=DB_POOL
+    ),
 }
 
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = parse_database_url(
+        DATABASE_REPLICA_URL, BASE_DIR,
+        conn_max_age=DB_CONN_MAX_AGE, health_checks=True, pool=DB_POOL
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    # Read-only list endpoints opt in with core.database.replica_reads
+    DATABASE_ROUTERS = ['core.database.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -175,23 +193,47 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "base.authentication.CachedJWTAuthentication",
         # "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
+        "base.authentication.CachedBasicAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_THROTTLE_CLASSES": ["base.ratelimit.LocalUserRateThrottle"],
+    "DEFAULT_THROTTLE_RATES": {"user": "60/min"},
+    # Proxies in front of Django that append to X-Forwarded-For (1 behind Traefik).
+    # With 0 the header is ignored; anything higher than the real number of proxies
+    # lets clients pick the address the per-IP limits count them under
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", '0')),
 }
 
-
-REST_FRAME_SIMPLEJWT = {
-    "AUTH_HEADER_NAME": "HTTP_AUTHORIZATION",
-    "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.RefreshToken",),
-    "DEFAULT_THROTTLE_CLASSES": ["rest_framework.throttling.UserRateThrottle"],
-    "DEFAULT_THROTTLE_RATES": {"user": "60/min"},
+# CachedJWTAuthentication: seconds a resolved user/role/specialist principal is reused,
+# in the shared cache (cleared on change) and in each process (not cleared elsewhere).
+# With the DatabaseCache below a shared-cache hit is still one query (instead of two);
+# the per-request saving comes from the process cache unless CACHES['default'] is
+# moved to Redis or Memcached
+AUTH_PRINCIPAL_CACHE_TIMEOUT = int(os.getenv("AUTH_PRINCIPAL_CACHE_TIMEOUT", '300'))
+AUTH_PRINCIPAL_LOCAL_TIMEOUT = int(os.getenv("AUTH_PRINCIPAL_LOCAL_TIMEOUT", '5'))
+# CachedBasicAuthentication: seconds verified credentials skip password hashing
+BASIC_AUTH_CACHE_TIMEOUT = int(os.getenv("BASIC_AUTH_CACHE_TIMEOUT", '60'))
+
+
+# Login, signup and password reset limits: scope -> (attempts, window in seconds).
+# Counted in the RateLimitCounter table, atomically, before any password is hashed
+AUTH_RATE_LIMITS = {
+    'login_ip': (30, 5 * 60),
+    # Failed logins only
+    'login_username': (5, 5 * 60),
+    'signup_ip': (10, 60 * 60),
+    'reset_ip': (10, 60 * 60),
+    'reset_email': (3, 15 * 60),
+    'reset_confirm_email': (5, 15 * 60),
 }
+# Password reset codes (expired ones are deleted by python manage.py purge_reset_codes)
+PASSWORD_RESET_CODE_MINUTES = int(os.getenv("PASSWORD_RESET_CODE_MINUTES", '5'))
+PASSWORD_RESET_CODE_MAX_ATTEMPTS = int(os.getenv("PASSWORD_RESET_CODE_MAX_ATTEMPTS", '5'))
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
@@ -238,7 +280,7 @@ SPECTACULAR_SETTINGS = {
 
 SPECTACULAR_SETTINGS["AUTHENTICATION_WHITELIST"] = [
     # "rest_framework.authentication.SessionAuthentication",
-    "rest_framework_simplejwt.authentication.JWTAuthentication",
+    "base.authentication.CachedJWTAuthentication",
 ]
 SPECTACULAR_SETTINGS["COMPONENTS"] = {
     "securitySchemes": {
@@ -256,6 +298,17 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 # Ensure a default from email to avoid None errors
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", EMAIL_HOST_USER or 'no-reply@localhost')
+# Seconds before an unresponsive mail server fails a send (the worker retries later)
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", '30'))
+# Outbox worker (python manage.py send_queued_emails)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", '50'))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", '6'))
+
+# Appointment reminders (python manage.py send_appointment_reminders)
+APPOINTMENT_REMINDER_LEAD_HOURS = float(os.getenv("APPOINTMENT_REMINDER_LEAD_HOURS", '24'))
+APPOINTMENT_REMINDER_BATCH_SIZE = int(os.getenv("APPOINTMENT_REMINDER_BATCH_SIZE", '500'))
+# Dotted path of the SMS gateway class; the default only logs messages
+SMS_GATEWAY = os.getenv("SMS_GATEWAY", 'authentication.services.sms.gateway.ConsoleSMSGateway')
 
 
 # AI Model Configuration
@@ -276,5 +329,10 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'ai_response_cache',
         'TIMEOUT': None,  # Cache forever unless manually cleared
-    }
+    },
+    # Per-process counters of the general request throttle
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
 }
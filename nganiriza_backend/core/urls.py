@@ -13,6 +13,7 @@ urlpatterns = [
     path('api/ai/', include('api.urls.ai')),
     path("api/specialists/", include('api.urls.specialists')),
     path("api/admin/", include('api.urls.admin')),
+    path("api/locations/", include('api.urls.locations')),
 
     # Swagger UI
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
@@ -0,0 +1,140 @@
+import math
+from django.db.models import Q
+from base.querysets import prefix_q
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Precision stored on rows; cells are about 4.8 x 4.8 m at the equator
+GEOHASH_PRECISION = 9
+
+# First cell size tried by k-nearest searches, about 4.9 km at the equator
+KNN_START_PRECISION = 5
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point; nearby points share long prefixes"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, starting with longitude
+        target, point = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        value <<= 1
+        if point >= middle:
+            value |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def cell_size_degrees(precision):
+    """(height, width) in degrees of a geohash cell of `precision` characters"""
+    total_bits = precision * 5
+    lat_bits = total_bits // 2
+    lon_bits = total_bits - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def cell_min_size_km(precision, latitude):
+    """Shortest side in km of a `precision` cell at `latitude`"""
+    height, width = cell_size_degrees(precision)
+    return min(height, width * math.cos(math.radians(latitude))) * KM_PER_DEGREE
+
+
+def neighbourhood(latitude, longitude, precision):
+    """
+    The geohash of the cell containing the point and of its eight neighbours.
+    Every point closer to the centre than the cell's shortest side lies in one of them.
+    """
+    height, width = cell_size_degrees(precision)
+    cells = set()
+    for d_lat in (-height, 0, height):
+        lat = min(max(latitude + d_lat, -90.0), 90.0 - 1e-9)
+        for d_lon in (-width, 0, width):
+            lon = (longitude + d_lon + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(lat, lon, precision))
+    return cells
+
+
+def geohash_prefix_q(prefixes, field='geohash'):
+    """Q matching rows whose geohash starts with any prefix, each served by the geohash index"""
+    q = Q()
+    for prefix in sorted(prefixes):
+        q |= prefix_q(field, prefix)
+    return q
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def precision_for_radius(radius_km, latitude):
+    """Longest geohash precision whose cells are at least `radius_km` on every side"""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if cell_min_size_km(precision, latitude) >= radius_km:
+            return precision
+    return 0
+
+
+def _with_distances(queryset, latitude, longitude):
+    rows = []
+    for obj in queryset:
+        distance = haversine_km(latitude, longitude, float(obj.latitude), float(obj.longitude))
+        rows.append((distance, obj.pk, obj))
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return [(obj, distance) for distance, _, obj in rows]
+
+
+def _candidates(queryset, latitude, longitude, precision):
+    if precision == 0:
+        return queryset
+    return queryset.filter(geohash_prefix_q(neighbourhood(latitude, longitude, precision)))
+
+
+def nearest(queryset, latitude, longitude, limit=10, radius_km=None):
+    """
+    The `limit` rows of `queryset` closest to the point, as (obj, distance in km)
+    pairs, nearest first, optionally within `radius_km`.
+
+    Rows need `latitude`, `longitude` and `geohash`. Candidates are read from the
+    geohash cells around the point; with a radius that is one query, otherwise
+    the search widens cell by cell until the `limit` nearest are certain.
+    """
+    queryset = queryset.exclude(geohash='')
+
+    if radius_km is not None:
+        precision = precision_for_radius(radius_km, latitude)
+        found = _with_distances(_candidates(queryset, latitude, longitude, precision), latitude, longitude)
+        return [(obj, distance) for obj, distance in found if distance <= radius_km][:limit]
+
+    precision = KNN_START_PRECISION
+    while True:
+        found = _with_distances(_candidates(queryset, latitude, longitude, precision), latitude, longitude)
+        # Only rows within the cell size are guaranteed to be the nearest ones
+        reach = cell_min_size_km(precision, latitude) if precision else math.inf
+        certain = [(obj, distance) for obj, distance in found if distance <= reach]
+        if len(certain) >= limit or precision == 0:
+            return certain[:limit]
+        if len(found) >= limit:
+            # The limit-th candidate bounds the answer, so one radius query settles it
+            return nearest(queryset, latitude, longitude, limit, radius_km=found[limit - 1][1])
+        precision -= 1
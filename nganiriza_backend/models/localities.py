@@ -0,0 +1,151 @@
+import threading
+import time
+from base.caching import bump_version, get_version
+from models.search import normalize_search_text
+
+CACHE_NAMESPACE = 'localities'
+
+# How long a process trusts its index before checking the shared version stamp
+VERSION_CHECK_INTERVAL = 30
+
+LEVEL_NAMES = ('province', 'district', 'sector', 'cell', 'village')
+
+
+class LocalityIndex:
+    """
+    Immutable in-memory view of the Province > District > Sector > Cell > Village
+    hierarchy. Names are matched case- and accent-insensitively.
+    """
+
+    def __init__(self, version, rows_by_level):
+        self.version = version
+        # Per level: id -> (name, parent id)
+        self.nodes = []
+        # Per level: (parent id, normalized name) -> id
+        self.by_parent = []
+        # Per level: normalized name -> first id with that name, for lookups without a parent
+        self.by_name = []
+        # Per level: parent id -> child ids, in name order
+        self.children = []
+
+        for rows in rows_by_level:
+            nodes, by_parent, by_name, children = {}, {}, {}, {}
+            for pk, name, parent_id in sorted(rows, key=lambda row: (row[1], row[0])):
+                key = normalize_search_text(name)
+                nodes[pk] = (name, parent_id)
+                by_parent.setdefault((parent_id, key), pk)
+                by_name.setdefault(key, pk)
+                children.setdefault(parent_id, []).append(pk)
+            self.nodes.append(nodes)
+            self.by_parent.append(by_parent)
+            self.by_name.append(by_name)
+            self.children.append(children)
+
+    @classmethod
+    def load(cls, version):
+        from models.models import Province, District, Sector, Cell, Village
+
+        levels = [
+            Province.objects.values_list('id', 'name'),
+            District.objects.values_list('id', 'name', 'province_id'),
+            Sector.objects.values_list('id', 'name', 'district_id'),
+            Cell.objects.values_list('id', 'name', 'sector_id'),
+            Village.objects.values_list('id', 'name', 'cell_id'),
+        ]
+        # Provinces have no parent; pad their rows to (id, name, None)
+        rows_by_level = [
+            [row if len(row) == 3 else (*row, None) for row in queryset.iterator(chunk_size=5000)]
+            for queryset in levels
+        ]
+        return cls(version, rows_by_level)
+
+    def lookup(self, level, name, parent_id=None):
+        """Id of the `level` ('province', 'district', ...) called `name`, under `parent_id` if given"""
+        depth = LEVEL_NAMES.index(level)
+        key = normalize_search_text(name)
+        if parent_id is not None:
+            return self.by_parent[depth].get((parent_id, key))
+        return self.by_name[depth].get(key)
+
+    def parent_of(self, level, pk):
+        node = self.nodes[LEVEL_NAMES.index(level)].get(pk)
+        return node[1] if node else None
+
+    def exists(self, level, pk):
+        return pk in self.nodes[LEVEL_NAMES.index(level)]
+
+    def resolve(self, province=None, district=None, sector=None):
+        """
+        Resolve province/district/sector names to ids, each level narrowed by the
+        one above it when known. A district also fixes its province. Unknown names
+        resolve to None.
+        """
+        province_id = self.lookup('province', province) if province else None
+        district_id = None
+        if district:
+            district_id = self.lookup('district', district, province_id)
+            if district_id is None and province_id is None:
+                district_id = self.lookup('district', district)
+            if district_id is not None:
+                province_id = self.parent_of('district', district_id)
+        sector_id = None
+        if sector:
+            sector_id = self.lookup('sector', sector, district_id)
+            if sector_id is None and district_id is None:
+                sector_id = self.lookup('sector', sector)
+        return province_id, district_id, sector_id
+
+    def tree(self, depth='sector'):
+        """
+        The hierarchy down to `depth` as nested [id, name, children] lists
+        (leaves are [id, name]), in name order.
+        """
+        last = LEVEL_NAMES.index(depth)
+
+        def build(level, parent_id):
+            nodes = []
+            for pk in self.children[level].get(parent_id, []):
+                name = self.nodes[level][pk][0]
+                if level < last:
+                    nodes.append([pk, name, build(level + 1, pk)])
+                else:
+                    nodes.append([pk, name])
+            return nodes
+
+        return build(0, None)
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_locality_index(max_age=VERSION_CHECK_INTERVAL):
+    """
+    The process-wide LocalityIndex, rebuilt when the shared version stamp changes
+    (checked at most every `max_age` seconds; 0 always checks).
+    """
+    global _index, _checked_at
+    now = time.monotonic()
+    # Read once: another thread may swap it in between
+    current = _index
+    if current is not None and now - _checked_at < max_age:
+        return current
+
+    with _lock:
+        version = get_version(CACHE_NAMESPACE)
+        current = _index
+        if current is None or current.version != version:
+            current = _index = LocalityIndex.load(version)
+        _checked_at = now
+        return current
+
+
+def invalidate_locality_index():
+    """Mark every process's index stale; the current process reloads on next use"""
+    global _checked_at
+    bump_version(CACHE_NAMESPACE)
+    # The index itself stays in place for concurrent readers; only the next
+    # version check is brought forward
+    with _lock:
+        _checked_at = float('-inf')
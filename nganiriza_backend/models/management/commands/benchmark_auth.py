@@ -0,0 +1,60 @@
+import base64
+import statistics
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+from base.authentication import CachedBasicAuthentication, CachedJWTAuthentication
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of each authentication scheme. Creates a scratch "
+        "user in the configured database inside a transaction that is rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Authenticated requests per scheme (at least 1)")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1")
+        with transaction.atomic():
+            self.benchmark(options['requests'])
+            # Nothing the benchmark wrote is kept, cached credentials included
+            transaction.set_rollback(True)
+
+    def benchmark(self, requests):
+        password = 'Benchmark-Pass-123!'
+        user = User.objects.create_user(username=f"benchmark-auth-{int(time.time())}", password=password)
+        factory = APIRequestFactory()
+        basic = 'Basic ' + base64.b64encode(f"{user.username}:{password}".encode()).decode()
+        bearer = f'Bearer {AccessToken.for_user(user)}'
+
+        schemes = [
+            ('jwt', JWTAuthentication(), bearer),
+            ('jwt (cached principal)', CachedJWTAuthentication(), bearer),
+            ('basic', BasicAuthentication(), basic),
+            ('basic (cached credentials)', CachedBasicAuthentication(), basic),
+        ]
+        self.stdout.write(f"{'scheme':<28} {'mean ms':>9} {'p95 ms':>9} {'max req/s':>10}")
+        for name, authenticator, header in schemes:
+            # The first call warms caches; it is not measured
+            authenticator.authenticate(Request(factory.get('/', HTTP_AUTHORIZATION=header)))
+            timings = []
+            for _ in range(requests):
+                request = Request(factory.get('/', HTTP_AUTHORIZATION=header))
+                started = time.perf_counter()
+                authenticated = authenticator.authenticate(request)
+                timings.append((time.perf_counter() - started) * 1000)
+                if authenticated is None or authenticated[0].pk != user.pk:
+                    raise CommandError(f"{name} did not authenticate the benchmark user")
+            mean = statistics.mean(timings)
+            p95 = sorted(timings)[max(0, int(len(timings) * 0.95) - 1)]
+            # Requests a single worker could authenticate per second, doing nothing else
+            self.stdout.write(f"{name:<28} {mean:>9.3f} {p95:>9.3f} {1000 / mean:>10.0f}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.views.admin.services.provider_transfer import ImportFormatError, import_providers, layout_for
+
+
+class Command(BaseCommand):
+    help = "Import service providers from a CSV or JSONL file (valid rows are created, the others reported)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Path to the CSV or JSONL file")
+        parser.add_argument('--layout', choices=['csv', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per INSERT statement")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate, write nothing")
+
+    def handle(self, *args, **options):
+        layout = options['layout'] or layout_for(options['file'])
+        try:
+            with open(options['file'], 'rb') as f:
+                report = import_providers(
+                    f, layout, batch_size=options['batch_size'], dry_run=options['dry_run']
+                )
+        except FileNotFoundError:
+            raise CommandError(f"File not found: {options['file']}")
+        except (ImportFormatError, UnicodeDecodeError) as e:
+            raise CommandError(f"Could not read {options['file']}: {e}")
+
+        for error in report['errors']:
+            details = '; '.join(f"{field}: {message}" for field, message in error['errors'].items())
+            self.stderr.write(f"line {error['line']}: {details}")
+        prefix = "[dry run] " if report['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{report['rows']} rows, {report['created']} created, {report['failed']} failed"
+        ))
@@ -1,23 +1,173 @@
 import json
-from django.core.management.base import BaseCommand
+import re
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from models.localities import invalidate_locality_index
 from models.models import Province, District, Sector, Cell, Village
 
+DEFAULT_FILE = Path(__file__).resolve().parents[2] / 'data' / 'localities.json'
+
+# (model, parent foreign key, key of the children in the JSON), top to bottom
+LEVELS = [
+    (Province, None, 'districts'),
+    (District, 'province', 'sectors'),
+    (Sector, 'district', 'cells'),
+    (Cell, 'sector', 'villages'),
+    (Village, 'cell', None),
+]
+
+_PROVINCES_RE = re.compile(r'"provinces"\s*:\s*\[')
+_SKIP_RE = re.compile(r'[\s,]*')
+
+
+def iter_provinces(path, chunk_size=64 * 1024):
+    """
+    Yield the objects of the top-level "provinces" array one at a time, reading
+    the file in chunks so only one province subtree is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        while True:
+            match = _PROVINCES_RE.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                break
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise CommandError(f'No "provinces" array found in {path}')
+            # Keep a tail in case the key straddles two chunks
+            buffer = buffer[-32:] + chunk
+
+        eof = False
+        while True:
+            buffer = buffer[_SKIP_RE.match(buffer).end():]
+            if buffer.startswith(']'):
+                return
+            try:
+                province, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise CommandError(f"Malformed locality file {path}")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield province
+            buffer = buffer[end:]
+
+
 class Command(BaseCommand):
-    help = "Import Rwanda location hierarchy from JSON"
+    help = "Import Rwanda location hierarchy from JSON (idempotent; reports what changed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=str(DEFAULT_FILE), help="Path to the localities JSON file")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per INSERT statement")
+        parser.add_argument('--dry-run', action='store_true', help="Only report the differences, write nothing")
 
     def handle(self, *args, **options):
-        with open('models/data/localities.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        for prov in data.get("provinces", []):
-            prov_obj, _ = Province.objects.get_or_create(name=prov["name"])
-            for dist in prov.get("districts", []):
-                dist_obj, _ = District.objects.get_or_create(name=dist["name"], province=prov_obj)
-                for sect in dist.get("sectors", []):
-                    sect_obj, _ = Sector.objects.get_or_create(name=sect["name"], district=dist_obj)
-                    for cell in sect.get("cells", []):
-                        cell_obj, _ = Cell.objects.get_or_create(name=cell["name"], sector=sect_obj)
-                        for vill in cell.get("villages", []):
-                            Village.objects.get_or_create(name=vill["name"], cell=cell_obj)
-
-        self.stdout.write(self.style.SUCCESS("Imported Rwanda location data"))
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+        started = time.perf_counter()
+
+        # (parent id, name) -> id for every level, so parents resolve without queries
+        self.index = [self._load_index(level) for level in range(len(LEVELS))]
+        self.existing = [set(index.values()) for index in self.index]
+        self.seen = [set() for _ in LEVELS]
+        self.stats = [{'in_file': 0, 'created': 0} for _ in LEVELS]
+
+        try:
+            with transaction.atomic():
+                for province in iter_provinces(options['file']):
+                    nodes = [(None, province)]
+                    for level in range(len(LEVELS)):
+                        nodes = self._sync_level(level, nodes)
+        except FileNotFoundError:
+            raise CommandError(f"Locality file not found: {options['file']}")
+
+        # bulk_create sends no signals, so tell the cached locality index ourselves
+        if not self.dry_run and any(stats['created'] for stats in self.stats):
+            invalidate_locality_index()
+
+        self._report(time.perf_counter() - started)
+
+    def _load_index(self, level):
+        model, parent_field, _ = LEVELS[level]
+        parent_attname = f"{parent_field}_id" if parent_field else None
+        fields = ['id', 'name'] + ([parent_attname] if parent_attname else [])
+        return {
+            (row.get(parent_attname), row['name']): row['id']
+            for row in model.objects.values(*fields).iterator(chunk_size=5000)
+        }
+
+    def _sync_level(self, level, nodes):
+        """
+        Create the missing rows of one level for `nodes` (pairs of parent id and
+        JSON node) and return the (id, child node) pairs of the next level.
+        """
+        model, parent_field, children_key = LEVELS[level]
+        index = self.index[level]
+        stats = self.stats[level]
+
+        missing = {}
+        for parent_id, node in nodes:
+            key = (parent_id, node['name'])
+            stats['in_file'] += 1
+            if key in index:
+                self.seen[level].add(index[key])
+            else:
+                missing[key] = None
+        missing = list(missing)
+
+        if missing:
+            stats['created'] += len(missing)
+            if self.dry_run:
+                # Placeholder ids so the children of new rows are reported as new too
+                for key in missing:
+                    index[key] = ('new', level, key)
+            else:
+                self._create(level, missing)
+
+        if not children_key:
+            return []
+        return [
+            (index[(parent_id, node['name'])], child)
+            for parent_id, node in nodes
+            for child in node.get(children_key, [])
+        ]
+
+    def _create(self, level, keys):
+        model, parent_field, _ = LEVELS[level]
+        parent_attname = f"{parent_field}_id" if parent_field else None
+        model.objects.bulk_create(
+            [model(name=name, **({parent_attname: parent_id} if parent_attname else {})) for parent_id, name in keys],
+            batch_size=self.batch_size,
+            # Rows inserted concurrently by another run are simply picked up below
+            ignore_conflicts=True,
+        )
+
+        # ignore_conflicts does not return ids, read them back in one query
+        if parent_attname:
+            rows = model.objects.filter(
+                **{f"{parent_attname}__in": {parent_id for parent_id, _ in keys}}
+            ).values_list(parent_attname, 'name', 'id')
+        else:
+            rows = model.objects.filter(name__in=[name for _, name in keys]).values_list('name', 'id')
+            rows = [(None, name, pk) for name, pk in rows]
+        for parent_id, name, pk in rows:
+            self.index[level][(parent_id, name)] = pk
+
+    def _report(self, elapsed):
+        prefix = "[dry run] " if self.dry_run else ""
+        for (model, _, _), stats, existing, seen in zip(LEVELS, self.stats, self.existing, self.seen):
+            unchanged = stats['in_file'] - stats['created']
+            only_in_db = len(existing - seen)
+            self.stdout.write(
+                f"{prefix}{model.__name__}: {stats['in_file']} in file, {stats['created']} created, "
+                f"{unchanged} unchanged, {only_in_db} only in database"
+            )
+        total = sum(stats['created'] for stats in self.stats)
+        verb = "Would import" if self.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} new locations in {elapsed:.2f}s"))
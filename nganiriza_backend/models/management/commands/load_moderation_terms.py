@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from models.models import LANGUAGE_CHOICES, ModerationTerm
+from models.moderation import invalidate_moderation_engine
+
+
+class Command(BaseCommand):
+    help = "Load moderation terms from a text file with one term per line ('#' starts a comment)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Term list to load")
+        parser.add_argument('--language', required=True, choices=[code for code, _ in LANGUAGE_CHOICES])
+        parser.add_argument('--category', required=True, help="Category reported for these terms")
+        parser.add_argument('--match', default='word', choices=[code for code, _ in ModerationTerm.MATCH_CHOICES])
+        parser.add_argument('--action', default='block', choices=[code for code, _ in ModerationTerm.ACTION_CHOICES])
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'r', encoding='utf-8') as f:
+                terms = {line.split('#', 1)[0].strip() for line in f}
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        terms.discard('')
+
+        before = ModerationTerm.objects.count()
+        # Terms already listed for the language are left as they are
+        ModerationTerm.objects.bulk_create([
+            ModerationTerm(
+                term=term[:100], language=options['language'], category=options['category'],
+                match=options['match'], action=options['action'],
+            )
+            for term in sorted(terms)
+        ], batch_size=1000, ignore_conflicts=True)
+        # bulk_create sends no signals
+        invalidate_moderation_engine()
+
+        added = ModerationTerm.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(f"Added {added} of {len(terms)} {options['language']} terms"))
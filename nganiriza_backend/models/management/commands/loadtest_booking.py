@@ -0,0 +1,110 @@
+import threading
+import time
+from datetime import date, time as dtime, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, OperationalError
+from models.models import Account, Appointment, SpecialistProfile
+from api.views.specialists.services.booking import SlotUnavailable, reserve_appointment
+
+
+class Command(BaseCommand):
+    help = "Fire concurrent bookings at the same slot and verify that at most one of them wins"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=20, help="Number of simultaneous booking attempts per slot")
+        parser.add_argument('--slots', type=int, default=5, help="Number of distinct slots to contend for")
+        parser.add_argument('--specialist', type=int, help="Existing SpecialistProfile id (a scratch specialist is created otherwise)")
+        parser.add_argument('--keep', action='store_true', help="Keep the scratch users and appointments afterwards")
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        slots = options['slots']
+        prefix = f"loadtest-{int(time.time())}"
+
+        users = [
+            User.objects.create(username=f"{prefix}-user-{i}", email=f"{prefix}-user-{i}@example.com")
+            for i in range(concurrency)
+        ]
+        scratch_specialist_user = None
+        if options['specialist']:
+            try:
+                specialist = SpecialistProfile.objects.get(pk=options['specialist'])
+            except SpecialistProfile.DoesNotExist:
+                raise CommandError(f"SpecialistProfile {options['specialist']} does not exist")
+        else:
+            scratch_specialist_user = User.objects.create(username=f"{prefix}-specialist")
+            account = Account.objects.create(user=scratch_specialist_user, role='specialist', name=prefix)
+            specialist = SpecialistProfile.objects.create(specialist_account=account, specialty='general', name=prefix)
+
+        # Far enough in the future not to collide with real bookings
+        slot_date = date.today() + timedelta(days=3650)
+        slot_times = [dtime(8 + i // 2, 30 * (i % 2)) for i in range(slots)]
+        results = {'booked': 0, 'conflict': 0, 'locked': 0, 'error': 0}
+        results_lock = threading.Lock()
+        elapsed = []
+
+        def attempt(user, slot_time, barrier):
+            outcome = 'booked'
+            barrier.wait()
+            started = time.perf_counter()
+            try:
+                reserve_appointment(user, specialist, slot_date, slot_time)
+            except SlotUnavailable:
+                outcome = 'conflict'
+            except OperationalError:
+                # SQLite refuses the second writer instead of queueing it
+                outcome = 'locked'
+            except Exception as e:
+                self.stderr.write(f"Unexpected error: {e}")
+                outcome = 'error'
+            finally:
+                connection.close()
+            with results_lock:
+                results[outcome] += 1
+                elapsed.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for slot_time in slot_times:
+            barrier = threading.Barrier(concurrency)
+            threads = [threading.Thread(target=attempt, args=(user, slot_time, barrier)) for user in users]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        total_time = time.perf_counter() - started
+
+        double_booked = []
+        for slot_time in slot_times:
+            active = Appointment.objects.filter(
+                specialist=specialist,
+                appointment_date=slot_date,
+                appointment_time=slot_time,
+                status__in=Appointment.ACTIVE_STATUSES
+            ).count()
+            if active > 1:
+                double_booked.append((slot_time, active))
+
+        attempts = concurrency * slots
+        elapsed.sort()
+        self.stdout.write(f"Attempts: {attempts} ({concurrency} concurrent x {slots} slots) in {total_time:.2f}s")
+        self.stdout.write(
+            f"Booked: {results['booked']}  Conflicts: {results['conflict']}  "
+            f"Lock errors: {results['locked']}  Other errors: {results['error']}"
+        )
+        if elapsed:
+            self.stdout.write(
+                f"Latency p50: {elapsed[len(elapsed) // 2] * 1000:.1f}ms  "
+                f"p95: {elapsed[int(len(elapsed) * 0.95) - 1] * 1000:.1f}ms"
+            )
+
+        if not options['keep']:
+            Appointment.objects.filter(specialist=specialist, appointment_date=slot_date, user__in=users).delete()
+            User.objects.filter(pk__in=[u.pk for u in users]).delete()
+            if scratch_specialist_user:
+                scratch_specialist_user.delete()
+
+        if double_booked:
+            details = ", ".join(f"{t} x{n}" for t, n in double_booked)
+            raise CommandError(f"Double booking detected: {details}")
+        self.stdout.write(self.style.SUCCESS("No slot was double-booked"))
@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from authentication.services.reset_codes import purge_expired_codes
+
+
+class Command(BaseCommand):
+    help = "Delete expired password reset codes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=3600, help="Seconds between purges")
+        parser.add_argument('--once', action='store_true', help="Purge once and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = purge_expired_codes()
+            if deleted:
+                self.stdout.write(f"Deleted {deleted} expired reset codes")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
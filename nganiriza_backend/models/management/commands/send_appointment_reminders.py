@@ -0,0 +1,31 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from api.views.specialists.services.reminders import BATCH_SIZE, CHANNELS, LEAD_TIME, send_appointment_reminders
+
+
+class Command(BaseCommand):
+    help = "Remind users of appointments starting soon, by email and SMS, once per appointment slot"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Appointments per query")
+        parser.add_argument('--interval', type=float, default=300, help="Seconds between scans")
+        parser.add_argument(
+            '--lead-hours', type=float, default=LEAD_TIME.total_seconds() / 3600,
+            help="Remind appointments starting within this many hours"
+        )
+        parser.add_argument('--channel', choices=CHANNELS, action='append', help="Only this channel (repeatable)")
+        parser.add_argument('--once', action='store_true', help="Scan once and exit")
+
+    def handle(self, *args, **options):
+        lead_time = timedelta(hours=options['lead_hours'])
+        channels = options['channel'] or CHANNELS
+        while True:
+            sent = send_appointment_reminders(
+                lead_time=lead_time, batch_size=options['batch_size'], channels=channels
+            )
+            if any(sent.values()):
+                self.stdout.write(', '.join(f"{count} {channel}" for channel, count in sent.items()) + " reminders sent")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from authentication.services.emails.outbox import BATCH_SIZE, send_due_emails
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails in batches over one SMTP connection, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Messages per SMTP connection")
+        parser.add_argument('--interval', type=float, default=5, help="Seconds to wait when the queue is empty")
+        parser.add_argument('--once', action='store_true', help="Send what is due and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = 0
+            # Drain everything due before sleeping
+            while True:
+                count = send_due_emails(options['batch_size'])
+                processed += count
+                if count < options['batch_size']:
+                    break
+            if processed:
+                self.stdout.write(f"Processed {processed} queued emails")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
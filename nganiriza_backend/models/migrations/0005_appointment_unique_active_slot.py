@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def cancel_double_bookings(apps, schema_editor):
+    """Cancel all but the earliest active booking of any slot so the constraint can be created."""
+    Appointment = apps.get_model('models', 'Appointment')
+    seen = set()
+    duplicates = []
+    active = Appointment.objects.filter(status__in=['pending', 'confirmed']).order_by('created_at', 'pk')
+    for appointment in active.only('pk', 'specialist_id', 'appointment_date', 'appointment_time'):
+        slot = (appointment.specialist_id, appointment.appointment_date, appointment.appointment_time)
+        if slot in seen:
+            duplicates.append(appointment.pk)
+        else:
+            seen.add(slot)
+    if duplicates:
+        Appointment.objects.filter(pk__in=duplicates).update(
+            status='cancelled',
+            cancellation_reason='Cancelled automatically: this time slot was double-booked.',
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_alter_basemodel_slug'),
+        ('models', '0004_alter_messages_conversation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'confirmed'])), fields=('specialist', 'appointment_date', 'appointment_time'), name='unique_active_appointment_slot'),
+        ),
+    ]
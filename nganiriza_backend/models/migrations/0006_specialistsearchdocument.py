@@ -0,0 +1,131 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:13
+
+import re
+import unicodedata
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of the models.search values at the time of this migration, so
+# later changes there cannot alter what it creates; change the index in a new one
+FTS_TABLE = 'models_specialistsearch_fts'
+DOCUMENT_TABLE = 'models_specialistsearchdocument'
+COLUMNS = 'name, clinic_name, specialty, bio, languages'
+NEW_VALUES = 'new.name, new.clinic_name, new.specialty, new.bio, new.languages'
+OLD_VALUES = 'old.name, old.clinic_name, old.specialty, old.bio, old.languages'
+# models.search queries with this exact expression so PostgreSQL uses the index
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(clinic_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(specialty, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(bio, '')), 'D') || "
+    "setweight(to_tsvector('simple', coalesce(languages, '')), 'C')"
+)
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _normalize(text):
+    # Casefolded, accent-stripped words, as models.search.normalize_search_text did
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(_WORD_RE.findall(stripped.casefold()))
+
+
+def _document_fields(specialist):
+    user = specialist.specialist_account.user
+    languages = specialist.languages_spoken or []
+    if not isinstance(languages, (list, tuple)):
+        languages = [languages]
+    return {
+        'name': _normalize(f"{user.first_name} {user.last_name} {user.username}"),
+        'clinic_name': _normalize(specialist.clinic_name),
+        'specialty': _normalize(f"{specialist.specialty} {specialist.get_specialty_display()}"),
+        'bio': _normalize(specialist.bio),
+        'languages': _normalize(' '.join(str(lang) for lang in languages)),
+    }
+
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        {COLUMNS}, content='{DOCUMENT_TABLE}', content_rowid='specialist_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.specialist_id, {NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.specialist_id, {OLD_VALUES});
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.specialist_id, {OLD_VALUES});
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.specialist_id, {NEW_VALUES});
+    END""",
+]
+
+SQLITE_BACKWARD = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+POSTGRES_INDEX = 'models_specialistsearch_tsv_idx'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            for statement in SQLITE_FORWARD:
+                schema_editor.execute(statement)
+        except Exception:
+            # SQLite without FTS5: search falls back to the unindexed document table
+            for statement in SQLITE_BACKWARD:
+                schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX {POSTGRES_INDEX} ON {DOCUMENT_TABLE} USING GIN (({POSTGRES_VECTOR}))'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_BACKWARD:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {POSTGRES_INDEX}')
+
+
+def index_existing_specialists(apps, schema_editor):
+    SpecialistProfile = apps.get_model('models', 'SpecialistProfile')
+    SpecialistSearchDocument = apps.get_model('models', 'SpecialistSearchDocument')
+    specialists = SpecialistProfile.objects.select_related('specialist_account__user')
+    SpecialistSearchDocument.objects.bulk_create(
+        [SpecialistSearchDocument(specialist=s, **_document_fields(s)) for s in specialists.iterator()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0005_appointment_unique_active_slot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpecialistSearchDocument',
+            fields=[
+                ('specialist', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='models.specialistprofile')),
+                ('name', models.TextField(blank=True)),
+                ('clinic_name', models.TextField(blank=True)),
+                ('specialty', models.TextField(blank=True)),
+                ('bio', models.TextField(blank=True)),
+                ('languages', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_specialists, migrations.RunPython.noop),
+    ]
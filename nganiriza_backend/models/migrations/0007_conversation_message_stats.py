@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:21
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_message_stats(apps, schema_editor):
+    Conversations = apps.get_model('models', 'Conversations')
+    Messages = apps.get_model('models', 'Messages')
+
+    for conversation in Conversations.objects.iterator(chunk_size=500):
+        messages = Messages.objects.filter(conversation_id=conversation.pk)
+        first_user_message = messages.filter(role='user').order_by('created_at').first()
+        last = messages.order_by('-created_at').first()
+        Conversations.objects.filter(pk=conversation.pk).update(
+            first_message_preview=first_user_message.content[:100] if first_user_message else None,
+            last_message_preview=last.content[:160] if last else None,
+            last_message_at=last.created_at if last else conversation.updated_at,
+            message_count=messages.count(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_alter_basemodel_slug'),
+        ('models', '0006_specialistsearchdocument'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversations',
+            name='first_message_preview',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversations',
+            name='last_message_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='conversations',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=160, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversations',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_message_stats, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='conversations',
+            index=models.Index(fields=['user', 'is_deleted', '-last_message_at'], name='conversation_sidebar_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_alter_basemodel_slug'),
+        ('models', '0007_conversation_message_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='conversations',
+            name='conversation_sidebar_idx',
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['specialist', 'status'], name='appt_specialist_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['specialist', 'appointment_date', 'appointment_time', 'basemodel_ptr'], name='appt_specialist_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['user', 'appointment_date', 'appointment_time', 'basemodel_ptr'], name='appt_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversations',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', 'last_message_at', 'id_number'], name='conversation_sidebar_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messages',
+            index=models.Index(fields=['conversation', 'basemodel_ptr'], name='message_conversation_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='specialistmessage',
+            index=models.Index(fields=['specialist', 'user', 'is_read'], name='spmsg_specialist_user_read_idx'),
+        ),
+    ]
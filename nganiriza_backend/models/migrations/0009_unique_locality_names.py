@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0008_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='cell',
+            constraint=models.UniqueConstraint(fields=('sector', 'name'), name='unique_cell_in_sector'),
+        ),
+        migrations.AddConstraint(
+            model_name='district',
+            constraint=models.UniqueConstraint(fields=('province', 'name'), name='unique_district_in_province'),
+        ),
+        migrations.AddConstraint(
+            model_name='province',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_province_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='sector',
+            constraint=models.UniqueConstraint(fields=('district', 'name'), name='unique_sector_in_district'),
+        ),
+        migrations.AddConstraint(
+            model_name='village',
+            constraint=models.UniqueConstraint(fields=('cell', 'name'), name='unique_village_in_cell'),
+        ),
+    ]
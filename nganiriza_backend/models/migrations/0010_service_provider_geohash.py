@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:35
+
+from django.db import migrations, models
+
+# Frozen copy of models.geo.geohash_encode at 9 characters, so later changes
+# there cannot alter what this backfill writes
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+
+def geohash_encode(latitude, longitude):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < GEOHASH_PRECISION:
+        target, point = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        value <<= 1
+        if point >= middle:
+            value |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def backfill_geohash(apps, schema_editor):
+    ServiceProvider = apps.get_model('models', 'ServiceProvider')
+
+    providers = list(ServiceProvider.objects.filter(latitude__isnull=False, longitude__isnull=False))
+    for provider in providers:
+        provider.geohash = geohash_encode(float(provider.latitude), float(provider.longitude))
+    ServiceProvider.objects.bulk_update(providers, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0009_unique_locality_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:41
+
+import re
+import unicodedata
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize_search_text(text):
+    # Frozen copy of models.search.normalize_search_text at the time of this migration
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(_WORD_RE.findall(stripped.casefold()))
+
+
+def backfill_user_search_tokens(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserSearchToken = apps.get_model('models', 'UserSearchToken')
+
+    batch = []
+    fields = ('username', 'email', 'first_name', 'last_name')
+    for pk, *values in User.objects.values_list('pk', *fields).iterator(chunk_size=2000):
+        words = set(normalize_search_text(' '.join(value or '' for value in values)).split())
+        batch.extend(UserSearchToken(user_id=pk, token=word[:150]) for word in words)
+        if len(batch) >= 5000:
+            UserSearchToken.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    UserSearchToken.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0010_service_provider_geohash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=150)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('token', 'user'), name='unique_user_search_token')],
+            },
+        ),
+        migrations.RunPython(backfill_user_search_tokens, migrations.RunPython.noop),
+    ]
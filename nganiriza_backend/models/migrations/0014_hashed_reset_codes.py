@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def delete_plaintext_codes(apps, schema_editor):
+    # Codes were stored in clear and live for minutes; dropping them only
+    # means pending resets are requested again
+    apps.get_model('models', 'ResetPassword').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0013_appointment_reminders'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_plaintext_codes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='resetpassword',
+            name='code',
+        ),
+        migrations.AddField(
+            model_name='resetpassword',
+            name='code_hash',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='resetpassword',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resetpassword',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='resetpassword',
+            name='email',
+            field=models.EmailField(max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='resetpassword',
+            name='expires',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:09
+
+from django.db import migrations, models
+
+
+def seed_moderation_terms(apps, schema_editor):
+    # The words previously hard-coded in moderate_message, which blocked them anywhere
+    # in a message ('abused', 'antispam'); substring matching keeps that behaviour
+    ModerationTerm = apps.get_model('models', 'ModerationTerm')
+    ModerationTerm.objects.bulk_create([
+        ModerationTerm(term=term, language='eng', category=term, match='substring', action='block')
+        for term in ('spam', 'violence', 'abuse')
+    ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0014_hashed_reset_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('language', models.CharField(choices=[('eng', 'English'), ('kny', 'Kinyarwanda'), ('fr', 'Français')], default='eng', max_length=25)),
+                ('category', models.CharField(max_length=50)),
+                ('match', models.CharField(choices=[('word', 'Whole word or phrase'), ('prefix', 'Words starting with the term'), ('substring', 'Anywhere, even inside words')], default='word', max_length=10)),
+                ('action', models.CharField(choices=[('block', 'Block'), ('flag', 'Flag')], default='block', max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('language', 'term'), name='unique_moderation_term')],
+            },
+        ),
+        migrations.RunPython(seed_moderation_terms, migrations.RunPython.noop),
+    ]
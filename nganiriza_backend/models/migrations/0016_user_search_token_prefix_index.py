@@ -0,0 +1,29 @@
+from django.db import migrations
+
+TOKEN_TABLE = 'models_usersearchtoken'
+POSTGRES_INDEX = 'models_usersearchtoken_prefix_idx'
+
+
+def create_prefix_index(apps, schema_editor):
+    # Prefix searches are LIKE 'term%' on PostgreSQL, which only a pattern_ops
+    # index serves under a non-C collation; SQLite range-scans the unique index
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} ON {TOKEN_TABLE} (token varchar_pattern_ops)'
+        )
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {POSTGRES_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0015_moderation_terms'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
@@ -1,8 +1,10 @@
 from email.policy import default
 from random import choice
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
-from base.models import BaseModel
+from base.models import BaseModel, suffixed_slug
+from models.geo import geohash_encode
 from django.utils import timezone
 from django.utils.text import slugify
 from django.conf import settings
@@ -34,22 +36,37 @@ SPECIALTY_CHOICES = [
 class Province(models.Model):
     name = models.CharField(max_length=100)
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['name'], name='unique_province_name')]
+
 class District(models.Model):
     name = models.CharField(max_length=100)
     province = models.ForeignKey(Province, on_delete=models.CASCADE, related_name="districts")
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['province', 'name'], name='unique_district_in_province')]
+
 class Sector(models.Model):
     name = models.CharField(max_length=100)
     district = models.ForeignKey(District, on_delete=models.CASCADE, related_name="sectors")
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['district', 'name'], name='unique_sector_in_district')]
+
 class Cell(models.Model):
     name = models.CharField(max_length=100)
     sector = models.ForeignKey(Sector, on_delete=models.CASCADE, related_name="cells")
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['sector', 'name'], name='unique_cell_in_sector')]
+
 class Village(models.Model):
     name = models.CharField(max_length=100)
     cell = models.ForeignKey(Cell, on_delete=models.CASCADE, related_name="villages")
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['cell', 'name'], name='unique_village_in_cell')]
+
 # For General Users
 
 class Account(BaseModel):
@@ -66,6 +83,25 @@ class Account(BaseModel):
     def __str__(self) -> str:
         return f"{self.user.username} - {self.name}"
 
+
+class UserSearchToken(models.Model):
+    """
+    One accent-folded, lower-cased word of a user's username, email or names.
+    The (token, user) index serves the admin's prefix search on SQLite, and a
+    varchar_pattern_ops index on PostgreSQL (migration 0016); kept in sync by
+    models.signals.
+    """
+    MAX_LENGTH = 150
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=MAX_LENGTH)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['token', 'user'], name='unique_user_search_token')]
+
+    def __str__(self):
+        return self.token
+
     
 
 class AccountEmail(models.Model):
@@ -77,13 +113,37 @@ class AccountEmail(models.Model):
 
 
 class ResetPassword(models.Model):
-    email = models.EmailField(max_length=255)
-    code = models.CharField(max_length=6)
-    expires = models.DateTimeField(default=timezone.now)
+    """
+    The active password reset code of an email address, managed by
+    authentication.services.reset_codes. Only a keyed hash of the code is stored.
+    """
+    # One active code per address; the unique index also serves lookups
+    email = models.EmailField(max_length=255, unique=True)
+    code_hash = models.CharField(max_length=64)
+    expires = models.DateTimeField(db_index=True)
+    # Wrong guesses against this code
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return str(self.email)
-    
+
+
+class RateLimitCounter(models.Model):
+    """
+    Events of one rate limit key in one fixed window, counted by
+    base.ratelimit.SlidingWindowLimiter with atomic UPDATEs.
+    """
+    # scope:digest:window
+    key = models.CharField(max_length=100, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    # When the window no longer weighs on the sliding one
+    expires = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
 class ResetPasswordConfirmation(models.Model):
     email = models.EmailField(max_length=255)
     user = models.ForeignKey(User, blank=True, on_delete=models.CASCADE, null=True)
@@ -123,15 +183,20 @@ class Profile(models.Model):
     
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base = slugify(getattr(self.user, "username", str(self.user)))
-            unique = base or "profile"
-            i = 1
-            while Profile.objects.filter(slug=unique).exists():
-                i += 1
-                unique = f"{base}-{i}"
-            self.slug = unique
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        base = slugify(getattr(self.user, "username", str(self.user)))[:50] or "profile"
+        self.slug = base
+        try:
+            # The unique index decides; no lookups in the common case
+            with transaction.atomic():
+                return super().save(*args, **kwargs)
+        except IntegrityError:
+            if not Profile.objects.filter(slug=base).exists():
+                raise
+        self.slug = suffixed_slug(base)
+        return super().save(*args, **kwargs)
 
     def __str__(self):
         return getattr(self.user, "username", str(self.user))
@@ -139,6 +204,9 @@ class Profile(models.Model):
 # For Specialists
 
 class SpecialistProfile(BaseModel):
+    # Cache namespace of the public directory, bumped by models.signals on any listed change
+    CACHE_NAMESPACE = 'specialist_directory'
+
     specialist_account = models.OneToOneField(
         Account,
         on_delete=models.CASCADE,
@@ -186,6 +254,28 @@ class SpecialistProfile(BaseModel):
         self.profile_completed = all(required_fields)
         return self.profile_completed
 
+
+class SpecialistSearchDocument(models.Model):
+    """
+    Accent-folded, lower-cased copy of the searchable specialist fields.
+    Backs the full-text index (FTS5 on SQLite, tsvector GIN index on PostgreSQL),
+    kept in sync by models.signals.
+    """
+    specialist = models.OneToOneField(
+        SpecialistProfile,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    name = models.TextField(blank=True)
+    clinic_name = models.TextField(blank=True)
+    specialty = models.TextField(blank=True)
+    bio = models.TextField(blank=True)
+    languages = models.TextField(blank=True)
+
+    def __str__(self):
+        return self.name
+
 class SpecialistAvailability(models.Model):
     """Detailed availability schedule for specialists"""
     specialist = models.ForeignKey(SpecialistProfile, on_delete=models.CASCADE, related_name='schedules')
@@ -209,6 +299,10 @@ class SpecialistAvailability(models.Model):
 
 class Appointment(BaseModel):
     """Appointment booking system"""
+    # Statuses that hold a specialist's time slot
+    ACTIVE_STATUSES = ['pending', 'confirmed']
+    GENERATE_SLUG = False
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='appointments')
     specialist = models.ForeignKey(SpecialistProfile, on_delete=models.CASCADE, related_name='appointments')
     appointment_date = models.DateField()
@@ -227,7 +321,36 @@ class Appointment(BaseModel):
     
     class Meta:
         ordering = ['-appointment_date', '-appointment_time']
-    
+        indexes = [
+            # Dashboard counters and status-filtered inboxes
+            models.Index(fields=['specialist', 'status'], name='appt_specialist_status_idx'),
+            # Specialist calendar, per-day counts and the specialist's appointment list.
+            # The list pages in (-date, -time, -pk) order: columns are ascending and end
+            # with the pk so reading the index backwards needs no sort
+            models.Index(
+                fields=['specialist', 'appointment_date', 'appointment_time', 'basemodel_ptr'],
+                name='appt_specialist_date_idx'
+            ),
+            # "My appointments", newest first, same layout
+            models.Index(
+                fields=['user', 'appointment_date', 'appointment_time', 'basemodel_ptr'],
+                name='appt_user_date_idx'
+            ),
+            # Reminder scheduler: active appointments starting within the next window
+            models.Index(
+                fields=['status', 'appointment_date', 'appointment_time'],
+                name='appt_status_date_idx'
+            ),
+        ]
+        constraints = [
+            # Last line of defence against concurrent double-booking of a slot
+            models.UniqueConstraint(
+                fields=['specialist', 'appointment_date', 'appointment_time'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='unique_active_appointment_slot',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username} with {self.specialist} on {self.appointment_date}"
 
@@ -260,6 +383,34 @@ class AppointmentHistory(models.Model):
         return f"{self.appointment} - {self.action_type} on {self.created_at}"
 
 
+class AppointmentReminder(models.Model):
+    """
+    A reminder sent for an appointment on one channel. Keyed by the appointment's
+    date and time, so a rescheduled appointment is reminded again.
+    """
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    ]
+
+    appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, related_name='reminders')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    appointment_date = models.DateField()
+    appointment_time = models.TimeField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['appointment', 'channel', 'appointment_date', 'appointment_time'],
+                name='unique_appointment_reminder',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} reminder for appointment {self.appointment_id} at {self.appointment_date} {self.appointment_time}"
+
+
 class SpecialistReview(models.Model):
     """Reviews for specialists"""
     specialist = models.ForeignKey(SpecialistProfile, on_delete=models.CASCADE, related_name='reviews')
@@ -282,6 +433,7 @@ class SpecialistMessage(BaseModel):
         ('open', 'Open'),
         ('closed', 'Closed'),
     ]
+    GENERATE_SLUG = False
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -300,6 +452,10 @@ class SpecialistMessage(BaseModel):
 
     class Meta:
         ordering = ['is_read', '-created_at']
+        indexes = [
+            # Per-patient threads and unread counts in the specialist inbox
+            models.Index(fields=['specialist', 'user', 'is_read'], name='spmsg_specialist_user_read_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name()} -> {self.specialist} ({self.subject})"
@@ -319,10 +475,67 @@ class Conversations(BaseModel):
     is_active = models.BooleanField(default=True)
     is_deleted = models.BooleanField(default=False)
 
+    # Kept up to date as messages are added so the chat sidebar never reads the messages table
+    FIRST_PREVIEW_LENGTH = 100
+    LAST_PREVIEW_LENGTH = 160
+    first_message_preview = models.CharField(max_length=FIRST_PREVIEW_LENGTH, blank=True, null=True)
+    last_message_preview = models.CharField(max_length=LAST_PREVIEW_LENGTH, blank=True, null=True)
+    last_message_at = models.DateTimeField(default=timezone.now)
+    message_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Sidebar page in (-last_message_at, -pk) order, read backwards without a sort.
+            # Partial rather than leading with is_deleted, which is queried as NOT is_deleted
+            models.Index(
+                fields=['user', 'last_message_at', 'id_number'],
+                condition=models.Q(is_deleted=False),
+                name='conversation_sidebar_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} - {self.channel}"
 
+    @classmethod
+    def record_messages(cls, conversation_id, messages, **fields):
+        """
+        Fold newly created messages (in creation order) into the conversation's
+        stored previews and counters with a single UPDATE, along with any other
+        `fields` to set.
+        """
+        if not messages:
+            return
+        last = messages[-1]
+        updates = {
+            **fields,
+            'last_message_preview': last.content[:cls.LAST_PREVIEW_LENGTH],
+            'last_message_at': last.created_at,
+            'message_count': models.F('message_count') + len(messages),
+        }
+        first_user_message = next((m for m in messages if m.role == 'user'), None)
+        if first_user_message:
+            updates['first_message_preview'] = Coalesce(
+                'first_message_preview',
+                models.Value(first_user_message.content[:cls.FIRST_PREVIEW_LENGTH])
+            )
+        cls.objects.filter(pk=conversation_id).update(**updates)
+
+    @classmethod
+    def refresh_message_stats(cls, conversation_id):
+        """Recompute the stored previews and counters from the messages table"""
+        messages = Messages.objects.filter(conversation_id=conversation_id)
+        first_user_message = messages.filter(role='user').order_by('basemodel_ptr').first()
+        last = messages.order_by('-basemodel_ptr').first()
+        updates = {
+            'first_message_preview': first_user_message.content[:cls.FIRST_PREVIEW_LENGTH] if first_user_message else None,
+            'last_message_preview': last.content[:cls.LAST_PREVIEW_LENGTH] if last else None,
+            'message_count': messages.count(),
+        }
+        if last:
+            updates['last_message_at'] = last.created_at
+        cls.objects.filter(pk=conversation_id).update(**updates)
+
 class Messages(BaseModel):
     ROLE_CHOICES = [
         ('user', 'user'),
@@ -330,6 +543,8 @@ class Messages(BaseModel):
         ('system', 'system')
     ]
 
+    GENERATE_SLUG = False
+
     id_number = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     conversation = models.ForeignKey(Conversations, on_delete=models.CASCADE, related_name='messages')
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='user')
@@ -338,10 +553,51 @@ class Messages(BaseModel):
     safety_flags = models.JSONField(default=dict, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [
+            # created_at lives on the base table and cannot be indexed together with the
+            # conversation, but parent rows are allocated in creation order, so history
+            # is read in basemodel_ptr order from this index instead
+            models.Index(fields=['conversation', 'basemodel_ptr'], name='message_conversation_order_idx'),
+        ]
+
     def __str__(self) -> str:
         return self.role + " - " + self.content
 
 
+class ModerationTerm(models.Model):
+    """
+    A word or phrase the chat moderation engine (models.moderation) looks for.
+    Terms are matched case- and accent-insensitively; edits reach running
+    processes within the engine's version check interval.
+    """
+    MATCH_CHOICES = [
+        ('word', 'Whole word or phrase'),
+        ('prefix', 'Words starting with the term'),
+        ('substring', 'Anywhere, even inside words'),
+    ]
+    ACTION_CHOICES = [
+        ('block', 'Block'),
+        ('flag', 'Flag'),
+    ]
+
+    term = models.CharField(max_length=100)
+    language = models.CharField(max_length=25, choices=LANGUAGE_CHOICES, default='eng')
+    category = models.CharField(max_length=50)
+    match = models.CharField(max_length=10, choices=MATCH_CHOICES, default='word')
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='block')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['language', 'term'], name='unique_moderation_term'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.language}, {self.category})"
+
+
 class Article(BaseModel):
     id_number = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     locale = models.CharField(max_length=5, choices=LANGUAGE_CHOICES, default="eng")
@@ -363,6 +619,9 @@ class MessageFeedback(models.Model):
 
 
 class ServiceProvider(BaseModel):
+    # Cache namespace of the public map feed, bumped by models.signals on any change
+    CACHE_NAMESPACE = 'service_provider_map'
+
     type = models.CharField(max_length=50)  # clinic, hotline, counselor, NGO
     phone = models.CharField(max_length=32, blank=True)
     province = models.ForeignKey(Province, on_delete=models.SET_NULL, null=True, blank=True)
@@ -372,6 +631,20 @@ class ServiceProvider(BaseModel):
     verified = models.BooleanField(default=False)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, help_text="GPS Latitude")
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, help_text="GPS Longitude")
+    # Derived from latitude/longitude on save; empty when the position is unknown
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        self.geohash = self.compute_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        return super().save(*args, **kwargs)
+
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return ''
+        return geohash_encode(float(self.latitude), float(self.longitude))
 
     def __str__(self) -> str:
         return self.name + " - " + self.type
@@ -391,4 +664,40 @@ class QueryCache(models.Model):
         indexes = [
             models.Index(fields=['query_hash']),
             models.Index(fields=['-last_accessed']),
-        ]
\ No newline at end of file
+        ]
+
+class OutboundEmail(models.Model):
+    """
+    Email waiting to be delivered by the send_queued_emails worker, so requests
+    never wait on the mail server.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to_email = models.EmailField(max_length=255)
+    subject = models.CharField(max_length=255)
+    text_body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Also serves as a lease: a worker pushes it forward while it sends the message
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue: only pending rows, oldest due first
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                name='outbox_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import deque, namedtuple
+from base.caching import bump_version, get_version
+from models.search import normalize_search_text
+
+CACHE_NAMESPACE = 'moderation_terms'
+
+# How long a process trusts its engine before checking the shared version stamp
+VERSION_CHECK_INTERVAL = 30
+
+Term = namedtuple('Term', ['term', 'language', 'category', 'match', 'action'])
+# `start` and `end` index the normalized text
+Match = namedtuple('Match', ['term', 'start', 'end'])
+
+
+class ModerationEngine:
+    """
+    Every moderation term compiled into one Aho-Corasick automaton, so a message
+    is scanned once whatever the size of the lexicon. Text and terms are
+    casefolded, stripped of accents and reduced to single-space separated words
+    before matching, so 'Abusé!' matches the term 'abuse'.
+
+    Terms match as whole words or phrases ('word'), at the start of a word
+    ('prefix') or anywhere ('substring').
+    """
+
+    def __init__(self, terms, version=None):
+        self.version = version
+        # Per state: character -> next state, the state to fall back to, and the
+        # (length, Term) pairs ending there, including those of its fallbacks
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+
+        for term in terms:
+            key = normalize_search_text(term.term)
+            if not key:
+                continue
+            state = 0
+            for ch in key:
+                next_state = self.goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][ch] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append(())
+                state = next_state
+            self.outputs[state] += ((len(key), term),)
+
+        # Breadth first, so a state's fallback is always complete before it is used
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+                self.outputs[next_state] += self.outputs[self.fail[next_state]]
+
+    def find(self, text, languages=None):
+        """Terms found in `text`, in order of their end, optionally only those of `languages`"""
+        text = normalize_search_text(text)
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        last = len(text) - 1
+        found = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not outputs[state]:
+                continue
+            for length, term in outputs[state]:
+                if languages is not None and term.language not in languages:
+                    continue
+                start = i - length + 1
+                if term.match != 'substring' and start > 0 and text[start - 1] != ' ':
+                    continue
+                if term.match == 'word' and i < last and text[i + 1] != ' ':
+                    continue
+                found.append(Match(term, start, i + 1))
+        return found
+
+    def categorize(self, text, languages=None):
+        """
+        ({category: matched terms}, action) for `text`. The action is 'block' if any
+        matched term blocks, 'flag' if terms only flag, '' when nothing matched.
+        """
+        flags = {}
+        action = ''
+        for match in self.find(text, languages):
+            terms = flags.setdefault(match.term.category, [])
+            if match.term.term not in terms:
+                terms.append(match.term.term)
+            if match.term.action == 'block' or not action:
+                action = match.term.action
+        return flags, action
+
+    @classmethod
+    def load(cls, version):
+        from models.models import ModerationTerm
+
+        rows = ModerationTerm.objects.filter(is_active=True).values_list(*Term._fields)
+        return cls([Term(*row) for row in rows.iterator(chunk_size=5000)], version)
+
+
+_engine = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_moderation_engine(max_age=VERSION_CHECK_INTERVAL):
+    """
+    The process-wide ModerationEngine, rebuilt from ModerationTerm when the shared
+    version stamp changes (checked at most every `max_age` seconds; 0 always checks).
+    """
+    global _engine, _checked_at
+    now = time.monotonic()
+    # Read once: another thread may swap it in between
+    current = _engine
+    if current is not None and now - _checked_at < max_age:
+        return current
+
+    with _lock:
+        version = get_version(CACHE_NAMESPACE)
+        current = _engine
+        if current is None or current.version != version:
+            current = _engine = ModerationEngine.load(version)
+        _checked_at = now
+        return current
+
+
+def invalidate_moderation_engine():
+    """Mark every process's engine stale; the current process rebuilds on next use"""
+    global _checked_at
+    bump_version(CACHE_NAMESPACE)
+    # The engine itself stays in place for concurrent readers; only the next
+    # version check is brought forward
+    with _lock:
+        _checked_at = float('-inf')
+
@@ -0,0 +1,179 @@
+import logging
+import re
+import unicodedata
+from django.db import connection, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'models_specialistsearch_fts'
+
+# Column weights used for ranking: name, clinic name, specialty, bio, languages
+FIELD_WEIGHTS = (10.0, 6.0, 4.0, 1.0, 2.0)
+POSTGRES_WEIGHTS = ('A', 'A', 'B', 'D', 'C')
+SEARCH_FIELDS = ('name', 'clinic_name', 'specialty', 'bio', 'languages')
+
+# Upper bound on ranked matches pulled from the index per search
+MAX_SEARCH_RESULTS = 500
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize_search_text(text):
+    """Casefold and strip accents so 'Épiphanie' and 'epiphanie' index identically"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(_WORD_RE.findall(stripped.casefold()))
+
+
+def search_terms(query):
+    """Split a user query into normalized terms"""
+    return normalize_search_text(query).split()
+
+
+def document_fields(specialist):
+    """Searchable values of a SpecialistProfile, normalized for the index"""
+    user = specialist.specialist_account.user
+    languages = specialist.languages_spoken or []
+    if not isinstance(languages, (list, tuple)):
+        languages = [languages]
+    return {
+        'name': normalize_search_text(f"{user.first_name} {user.last_name} {user.username}"),
+        'clinic_name': normalize_search_text(specialist.clinic_name),
+        'specialty': normalize_search_text(f"{specialist.specialty} {specialist.get_specialty_display()}"),
+        'bio': normalize_search_text(specialist.bio),
+        'languages': normalize_search_text(' '.join(str(lang) for lang in languages)),
+    }
+
+
+def index_specialist(specialist):
+    """Create or refresh the search document for a specialist"""
+    from models.models import SpecialistSearchDocument
+
+    SpecialistSearchDocument.objects.update_or_create(
+        specialist=specialist,
+        defaults=document_fields(specialist)
+    )
+
+
+USER_SEARCH_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+def user_tokens(user):
+    """Distinct normalized words of a user's username, email and names"""
+    from models.models import UserSearchToken
+
+    text = ' '.join(getattr(user, field) or '' for field in USER_SEARCH_FIELDS)
+    return {token[:UserSearchToken.MAX_LENGTH] for token in normalize_search_text(text).split()}
+
+
+def index_user(user):
+    """Bring a user's search tokens in line with their current fields"""
+    from models.models import UserSearchToken
+
+    tokens = user_tokens(user)
+    existing = set(UserSearchToken.objects.filter(user=user).values_list('token', flat=True))
+    if existing - tokens:
+        UserSearchToken.objects.filter(user=user, token__in=existing - tokens).delete()
+    if tokens - existing:
+        UserSearchToken.objects.bulk_create(
+            [UserSearchToken(user=user, token=token) for token in tokens - existing],
+            ignore_conflicts=True
+        )
+
+
+def user_search_q(query):
+    """
+    Q on User matching every term of `query` as a word prefix (accent- and
+    case-insensitive), each term an index scan over UserSearchToken.
+    """
+    from django.db.models import Q
+    from base.querysets import prefix_q
+    from models.models import UserSearchToken
+
+    q = Q()
+    for term in search_terms(query):
+        matching = UserSearchToken.objects.filter(prefix_q('token', term))
+        q &= Q(pk__in=matching.values('user_id'))
+    return q
+
+
+def _ranked_ids_sqlite(terms, limit):
+    # Quote every term so user input can never be parsed as FTS5 syntax; '*' makes it a prefix match
+    match = ' '.join(f'"{term}"*' for term in terms)
+    weights = ', '.join(str(w) for w in FIELD_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+            [match, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def postgres_vector_sql():
+    """Weighted tsvector expression over the search document columns"""
+    return ' || '.join(
+        f"setweight(to_tsvector('simple', coalesce({field}, '')), '{weight}')"
+        for field, weight in zip(SEARCH_FIELDS, POSTGRES_WEIGHTS)
+    )
+
+
+def _ranked_ids_postgres(terms, limit):
+    from models.models import SpecialistSearchDocument
+
+    table = SpecialistSearchDocument._meta.db_table
+    vector = postgres_vector_sql()
+    tsquery = ' & '.join(f"{term}:*" for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT specialist_id FROM {table} "
+            f"WHERE ({vector}) @@ to_tsquery('simple', %s) "
+            f"ORDER BY ts_rank({vector}, to_tsquery('simple', %s)) DESC LIMIT %s",
+            [tsquery, tsquery, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _ranked_ids_fallback(terms, limit):
+    """Unindexed prefix search for backends without full-text support"""
+    from django.db.models import Q
+    from models.models import SpecialistSearchDocument
+
+    documents = SpecialistSearchDocument.objects.all()
+    for term in terms:
+        term_q = Q()
+        for field in SEARCH_FIELDS:
+            term_q |= Q(**{f'{field}__startswith': term}) | Q(**{f'{field}__contains': f' {term}'})
+        documents = documents.filter(term_q)
+
+    scored = []
+    for doc in documents.values('specialist_id', *SEARCH_FIELDS)[:limit * 4]:
+        score = 0.0
+        for field, weight in zip(SEARCH_FIELDS, FIELD_WEIGHTS):
+            words = doc[field].split()
+            score += weight * sum(1 for term in terms for word in words if word.startswith(term))
+        scored.append((score, doc['specialist_id']))
+    scored.sort(key=lambda item: -item[0])
+    return [specialist_id for _, specialist_id in scored[:limit]]
+
+
+def ranked_specialist_ids(query, limit=MAX_SEARCH_RESULTS):
+    """
+    Ids of specialists matching every term of `query` (prefix, accent-insensitive),
+    best match first.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    try:
+        if connection.vendor == 'sqlite':
+            return _ranked_ids_sqlite(terms, limit)
+        if connection.vendor == 'postgresql':
+            return _ranked_ids_postgres(terms, limit)
+    except DatabaseError as e:
+        # e.g. SQLite built without FTS5: the virtual table was never created
+        logger.warning(f"Full-text specialist search unavailable, falling back: {e}")
+    return _ranked_ids_fallback(terms, limit)
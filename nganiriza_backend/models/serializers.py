@@ -62,11 +62,10 @@ class SignupRequestSerializer(serializers.Serializer):
 
 
 class ConversationsSerializer(serializers.ModelSerializer):
-    first_message_preview = serializers.SerializerMethodField()
-    
     class Meta:
         model = Conversations
         fields = '__all__'
+        read_only_fields = ['first_message_preview', 'last_message_preview', 'last_message_at', 'message_count']
     
     def to_representation(self, instance):
         """Override to map id_number to id for frontend compatibility"""
@@ -80,22 +79,6 @@ class ConversationsSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         return Conversations.objects.create(user=user, **validated_data)
 
-    def get_first_message_preview(self, obj):
-        """Get the first user message as preview"""
-        try:
-            first_user_message = obj.messages.filter(role='user').order_by('created_at').first()
-            if first_user_message:
-                return first_user_message.content[:100]  # First 100 characters
-        except Exception:
-            pass
-        return None
-
-    def get_last_message(self, obj):
-        m = obj.messages.order_by("-id").first()
-        if not m:
-            return None
-        return {"id": m.id, "role": m.role, "content": m.content[:160], "created_at": m.created_at}
-
     def validate_language(self, val):
         valid = {c[0] for c in LANGUAGE_CHOICES}
         if val not in valid:
@@ -151,6 +134,14 @@ class ServiceProviderSerializer(serializers.ModelSerializer):
             return [float(obj.latitude), float(obj.longitude)]
         return None
 
+
+class NearbyServiceProviderSerializer(ServiceProviderSerializer):
+    """Service provider with its distance from the searched point"""
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(ServiceProviderSerializer.Meta):
+        select_related = ['province', 'district', 'sector']
+
 class QuerySerializer(serializers.Serializer):
     conversation_id = serializers.UUIDField(required=False, allow_null=True)
     query = serializers.CharField(required=True, max_length=2000)
@@ -256,6 +247,7 @@ class SpecialistPublicSerializer(serializers.ModelSerializer):
             'profile_image', 'average_rating', 'total_reviews', 'clinic_name',
             'location', 'is_verified'
         ]
+        select_related = ['specialist_account__user', 'specialist_account__sector__district__province']
     
     def get_location(self, obj):
         account = obj.specialist_account
@@ -286,6 +278,7 @@ class AppointmentSerializer(serializers.ModelSerializer):
             'specialist_info', 'user_info', 'created_at'
         ]
         read_only_fields = ['user', 'created_at']
+        select_related = ['user', 'specialist__specialist_account__user']
     
     def get_specialist_info(self, obj):
         specialist_account = obj.specialist.specialist_account
@@ -316,18 +309,12 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         specialist = data.get('specialist')
         # if not specialist.is_verified:
         #     raise serializers.ValidationError("This specialist is not yet verified")
-        
-        # Check for conflicting appointments
-        existing = Appointment.objects.filter(
-            specialist=specialist,
-            appointment_date=data['appointment_date'],
-            appointment_time=data['appointment_time'],
-            status__in=['pending', 'confirmed']
-        ).exists()
-        
-        if existing:
-            raise serializers.ValidationError("This time slot is already booked")
-        
+
+        # Slot conflicts are checked when the booking is reserved, under a lock,
+        # see api.views.specialists.services.booking.reserve_appointment
+        if data.get('duration_minutes') is not None and data['duration_minutes'] <= 0:
+            raise serializers.ValidationError("Duration must be a positive number of minutes")
+
         return data
 
 
@@ -338,6 +325,7 @@ class SpecialistReviewSerializer(serializers.ModelSerializer):
         model = SpecialistReview
         fields = ['id', 'specialist', 'rating', 'comment', 'user_name', 'created_at']
         read_only_fields = ['user', 'created_at']
+        select_related = ['user']
     
     def validate_rating(self, value):
         if value < 1 or value > 5:
@@ -370,6 +358,7 @@ class SpecialistMessageSerializer(serializers.ModelSerializer):
             'is_read', 'status', 'created_at', 'specialist_info', 'user_info'
         ]
         read_only_fields = ['user', 'is_read', 'status', 'created_at']
+        select_related = ['user', 'specialist__specialist_account__user']
 
     def get_specialist_info(self, obj):
         specialist_user = obj.specialist.specialist_account.user
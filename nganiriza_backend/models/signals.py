@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from base.authentication import invalidate_principal
+from base.caching import bump_version
+from models.localities import invalidate_locality_index
+from models.moderation import invalidate_moderation_engine
+from models.models import (
+    Account, Cell, Conversations, District, Messages, ModerationTerm, Province, Sector, ServiceProvider,
+    SpecialistProfile, SpecialistReview, Village
+)
+from models.search import USER_SEARCH_FIELDS, index_specialist, index_user
+
+NAME_FIELDS = {'first_name', 'last_name', 'username'}
+# User saves limited to these fields leave cached principals valid
+PRINCIPAL_IRRELEVANT_FIELDS = {'last_login'}
+
+
+def invalidate_specialist_directory():
+    bump_version(SpecialistProfile.CACHE_NAMESPACE)
+
+
+@receiver(post_save, sender=SpecialistProfile)
+def reindex_specialist(sender, instance, **kwargs):
+    index_specialist(instance)
+    invalidate_specialist_directory()
+
+
+@receiver(post_delete, sender=SpecialistProfile)
+@receiver(post_save, sender=SpecialistReview)
+@receiver(post_delete, sender=SpecialistReview)
+def specialist_directory_changed(sender, instance, **kwargs):
+    invalidate_specialist_directory()
+
+
+@receiver(post_save, sender=Account)
+def specialist_account_changed(sender, instance, created, **kwargs):
+    # The public directory shows the specialist's location from the account
+    if not created and instance.role == 'specialist':
+        invalidate_specialist_directory()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_specialist_name(sender, instance, created, update_fields=None, **kwargs):
+    # Specialist names live on the user row; skip saves that cannot change them (e.g. last_login)
+    if created or (update_fields is not None and not NAME_FIELDS & set(update_fields)):
+        return
+    specialists = SpecialistProfile.objects.filter(
+        specialist_account__user=instance
+    ).select_related('specialist_account__user')
+    for specialist in specialists:
+        index_specialist(specialist)
+        invalidate_specialist_directory()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_user_search(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and not set(USER_SEARCH_FIELDS) & set(update_fields):
+        return
+    index_user(instance)
+
+
+@receiver(post_save, sender=Messages)
+def conversation_message_added(sender, instance, created, **kwargs):
+    if created:
+        Conversations.record_messages(instance.conversation_id, [instance])
+
+
+@receiver(post_delete, sender=Messages)
+def conversation_message_removed(sender, instance, origin=None, **kwargs):
+    # Nothing to keep in sync when the whole conversation is being deleted
+    if isinstance(origin, Conversations):
+        return
+    Conversations.refresh_message_stats(instance.conversation_id)
+
+
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=ServiceProvider)
+def service_provider_changed(sender, instance, **kwargs):
+    bump_version(ServiceProvider.CACHE_NAMESPACE)
+
+
+@receiver(post_save, sender=Province)
+@receiver(post_delete, sender=Province)
+@receiver(post_save, sender=District)
+@receiver(post_delete, sender=District)
+@receiver(post_save, sender=Sector)
+@receiver(post_delete, sender=Sector)
+@receiver(post_save, sender=Cell)
+@receiver(post_delete, sender=Cell)
+@receiver(post_save, sender=Village)
+@receiver(post_delete, sender=Village)
+def locality_changed(sender, instance, **kwargs):
+    invalidate_locality_index()
+
+
+@receiver(post_save, sender=ModerationTerm)
+@receiver(post_delete, sender=ModerationTerm)
+def moderation_term_changed(sender, instance, **kwargs):
+    invalidate_moderation_engine()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_principal_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= PRINCIPAL_IRRELEVANT_FIELDS:
+        return
+    invalidate_principal(instance.pk)
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def account_principal_changed(sender, instance, **kwargs):
+    invalidate_principal(instance.user_id)
+
+
+@receiver(post_save, sender=SpecialistProfile)
+@receiver(post_delete, sender=SpecialistProfile)
+def specialist_principal_changed(sender, instance, created=False, **kwargs):
+    # The principal only holds the profile id, which a plain update cannot change
+    if kwargs['signal'] is post_save and not created:
+        return
+    user_id = Account.objects.filter(pk=instance.specialist_account_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        invalidate_principal(user_id)
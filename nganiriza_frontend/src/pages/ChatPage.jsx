@@ -361,7 +361,7 @@ export function ChatPage() {
                         {conv.title || conv.first_message_preview || 'New conversation'}
                       </div>
                       <div className="conversation-time">
-                        {conv.updated_at ? new Date(conv.updated_at).toLocaleDateString() : ''}
+                        {conv.last_message_at ? new Date(conv.last_message_at).toLocaleDateString() : ''}
                       </div>
                     </button>
                   );